@@ -213,6 +213,7 @@ async def setup(bot):
         ) from e
     bot.add_cog(n)
     await n.cache.init_automod_enabled()
+    n.api.re_pool.processes = await n.data.regex_pool_processes()
     n.task = bot.loop.create_task(n.api._loop_task())
     if n.cache.automod_enabled:
         n.api.enable_automod()
@@ -1,12 +1,16 @@
 import asyncio
+import bisect
+import csv
 import discord
 import logging
 import re
 import functools
+import time
 
-from copy import deepcopy
-from collections import namedtuple
-from typing import Union, Optional, Iterable, Callable, Awaitable
+from collections import OrderedDict, deque
+from io import BytesIO, StringIO
+from string import Formatter
+from typing import Union, Optional, Iterable, Callable, Awaitable, AsyncIterator, Mapping
 from datetime import datetime, timedelta
 from multiprocessing import TimeoutError
 from multiprocessing.pool import Pool
@@ -27,6 +31,7 @@ from . import errors
 log = logging.getLogger("red.laggron.warnsystem")
 _ = Translator("WarnSystem", __file__)
 id_pattern = re.compile(r"([0-9]{15,21})$")
+image_pattern = re.compile(r"(https?://)\S+\.(jpg|jpeg|png|gif|webm)")
 
 
 class SafeMember:
@@ -144,6 +149,294 @@ class UnavailableMember(discord.abc.User, discord.abc.Messageable):
         return channel
 
 
+class RouteBuckets:
+    """
+    Pause the calls made to a group of Discord routes once one of them gets rate limited.
+
+    discord.py already respects the rate limits, but gives up after a few retries. During a
+    mass warn, the workers sharing a route (DMs, bans, role edits, modlog messages) wait for
+    the end of the rate limit instead of failing one after another.
+    """
+
+    max_attempts = 3
+
+    def __init__(self):
+        self.resume_at = {}  # bucket name > loop time when the calls can resume
+
+    async def wait(self, bucket: str):
+        loop = asyncio.get_event_loop()
+        delay = self.resume_at.get(bucket, 0) - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _retry_after(self, exception: discord.errors.HTTPException, attempt: int) -> float:
+        try:
+            return float(exception.response.headers["Retry-After"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return 5.0 * attempt
+
+    async def call(self, bucket: str, coro: Callable[..., Awaitable], *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        for attempt in range(1, self.max_attempts + 1):
+            await self.wait(bucket)
+            try:
+                return await coro(*args, **kwargs)
+            except discord.errors.HTTPException as e:
+                if e.status != 429 or attempt == self.max_attempts:
+                    raise
+                resume_at = loop.time() + self._retry_after(e, attempt)
+                self.resume_at[bucket] = max(self.resume_at.get(bucket, 0), resume_at)
+                log.debug(f"Route bucket {bucket} is rate limited, pausing the workers.")
+
+
+class CaseBatch:
+    """
+    Cases created during a mass warn, saved together instead of one Config write per member.
+
+    The pending cases are saved once ``max_size`` cases are waiting, or once the oldest one
+    waited for ``max_delay`` seconds, and when :meth:`flush` is called at the end of the warn.
+    """
+
+    def __init__(
+        self, cache: MemoryCache, guild: discord.Guild, max_size: int = 50, max_delay: float = 5
+    ):
+        self.cache = cache
+        self.guild = guild
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.pending = []
+        self.first_added_at = None
+        self.lock = asyncio.Lock()
+
+    async def add(self, member: discord.abc.Snowflake, case: dict):
+        loop = asyncio.get_event_loop()
+        if not self.pending:
+            self.first_added_at = loop.time()
+        self.pending.append((member.id, case))
+        if (
+            len(self.pending) >= self.max_size
+            or loop.time() - self.first_added_at >= self.max_delay
+        ):
+            await self.flush()
+
+    async def flush(self):
+        # if the caller is cancelled, the save still completes, nothing is lost or saved twice
+        await asyncio.shield(self._flush())
+
+    async def _flush(self):
+        async with self.lock:
+            cases = self.pending[:]
+            if not cases:
+                return
+            await self.cache.add_cases(self.guild, cases)
+            # only the saved cases are removed, workers can keep adding cases meanwhile
+            # if saving failed, they're still pending for the next flush
+            del self.pending[: len(cases)]
+
+
+class EmbedTemplate:
+    """
+    The parts of the warning embeds that only depend on the guild settings and the level.
+
+    Built once per guild and level from a settings snapshot, and built again when the snapshot
+    is replaced.
+    """
+
+    __slots__ = (
+        "settings",
+        "log_description",
+        "log_fields",
+        "user_description",
+        "user_fields",
+        "thumbnail",
+        "colour",
+        "url",
+        "show_mod",
+    )
+
+    def __init__(self, settings: Mapping, level: int):
+        self.settings = settings  # the snapshot this was built from
+        level = str(level)
+        self.log_description = settings["embed_description_modlog"][level]
+        self.log_fields = self._parse_fields(self.log_description)
+        self.user_description = settings["embed_description_user"][level]
+        self.user_fields = self._parse_fields(self.user_description)
+        self.thumbnail = settings["thumbnails"][level]
+        self.colour = settings["colors"][level]
+        self.url = settings["url"]
+        self.show_mod = settings["show_mod"]
+
+    @staticmethod
+    def _parse_fields(text: str) -> Optional[frozenset]:
+        """
+        Return the names of the fields used in a description, or `None` if it's invalid.
+        """
+        try:
+            return frozenset(
+                re.split(r"[.\[]", x[1], 1)[0] for x in Formatter().parse(text) if x[1] is not None
+            )
+        except ValueError:
+            return None
+
+    @property
+    def needs_invite(self) -> bool:
+        return "invite" in (self.log_fields or ()) or "invite" in (self.user_fields or ())
+
+
+class AntispamState:
+    """
+    Recent activity of a member in a channel, used by the antispam.
+    """
+
+    __slots__ = ("messages", "warned", "last_message")
+
+    def __init__(self, max_messages: int):
+        # timestamps of the last messages, only max_messages + 1 are needed to detect spam
+        self.messages = deque(maxlen=max_messages + 1)
+        self.warned = None  # timestamp of the last text warn
+        self.last_message = 0
+
+
+class RegexPoolRestarted(Exception):
+    """
+    The regex pool was restarted by another search while waiting for the result.
+    """
+
+    pass
+
+
+class RegexPool:
+    """
+    Process pool running the user defined regex patterns of the automod.
+
+    The pool is only started on the first search, then closed after being idle for
+    ``idle_timeout`` seconds. It is also closed when a search times out, since its process is
+    stuck on the pattern, and started again on the next search. ``processes`` is set with
+    ``[p]warnset regexprocesses``, it defaults to the number of CPUs if set to :py:obj:`None`.
+
+    `run_isolated` runs a search in a process of its own instead, to find which pattern is the
+    cause of a timeout without interrupting the searches of the other guilds.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, processes: Optional[int], idle_timeout: int
+    ):
+        self.loop = loop
+        self.processes = processes
+        self.idle_timeout = idle_timeout
+        self.pool: Optional[Pool] = None
+        self.idle_handle: Optional[asyncio.TimerHandle] = None
+        # stats shown in warnsysteminfo
+        self.starts = 0
+        self.tasks = 0
+        self.pending = 0  # tasks sent to the pool and not finished yet
+        self.timeouts = 0
+        self.restarts = 0  # searches interrupted by the timeout of another search
+        self.isolated_timeouts = 0  # see run_isolated
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def get_pool(self) -> Pool:
+        if self.pool is None:
+            self.pool = Pool(self.processes, maxtasksperchild=1000)
+            self.starts += 1
+            log.debug(f"Regex pool started with {self.pool._processes} processes.")
+        return self.pool
+
+    def close(self):
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+        if self.pool is not None:
+            # also kills the processes stuck on a catastrophic pattern
+            self._terminate(self.pool)
+            self.pool = None
+            log.debug("Regex pool closed.")
+
+    def _terminate(self, pool: Pool):
+        # terminating a pool waits for its processes and threads, don't block the loop
+        try:
+            self.loop.run_in_executor(None, pool.terminate)
+        except RuntimeError:  # the loop or its executor is already closed
+            pool.terminate()
+
+    async def run(self, method: str, func: Callable, args, timeout: float, **kwargs):
+        """
+        Call ``method`` of the pool (``apply_async``, ``starmap_async``...) and wait for the
+        result, without blocking the loop.
+
+        Raises :class:`multiprocessing.TimeoutError` or :class:`asyncio.TimeoutError` if the
+        search takes too long, the pool is then closed. Raises `RegexPoolRestarted` if the pool
+        was closed by another search meanwhile, the result is unknown.
+        """
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+        self.pending += 1
+        start = time.monotonic()
+        pool = self.get_pool()
+        try:
+            process = getattr(pool, method)(func, args, **kwargs)
+            task = functools.partial(process.get, timeout=timeout)
+            new_task = self.loop.run_in_executor(None, task)
+            return await asyncio.wait_for(new_task, timeout=timeout + 5)
+        except (TimeoutError, asyncio.TimeoutError):
+            if pool is not self.pool:
+                # our process was killed with the others
+                self.restarts += 1
+                raise RegexPoolRestarted from None
+            self.timeouts += 1
+            # a process is stuck on this search, it must be killed before the next searches
+            self.close()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            latency = time.monotonic() - start
+            self.pending -= 1
+            self.tasks += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if not self.pending and self.pool is not None:
+                self.idle_handle = self.loop.call_later(self.idle_timeout, self.close)
+
+    async def run_isolated(self, func: Callable, args, timeout: float):
+        """
+        Call ``func`` in a new process, apart from the pool, and wait for the result.
+
+        A timeout can only be caused by this search then. The process is killed once done.
+        Raises :class:`multiprocessing.TimeoutError` or :class:`asyncio.TimeoutError` if the
+        search takes too long.
+        """
+        pool = await self.loop.run_in_executor(None, Pool, 1)
+        try:
+            process = pool.apply_async(func, args)
+            task = functools.partial(process.get, timeout=timeout)
+            new_task = self.loop.run_in_executor(None, task)
+            return await asyncio.wait_for(new_task, timeout=timeout + 5)
+        except (TimeoutError, asyncio.TimeoutError):
+            self.isolated_timeouts += 1
+            raise
+        finally:
+            self._terminate(pool)
+
+    def stats(self) -> str:
+        if self.pool is not None:
+            state = f"running with {self.pool._processes} processes"
+        else:
+            state = "stopped"
+        average = self.total_latency / (self.tasks or 1) * 1000
+        return (
+            f"Regex pool: {state}, started {self.starts} times.\n"
+            f"{self.tasks} searches, {self.pending} pending, {self.timeouts} timeouts, "
+            f"{self.restarts} interrupted, {self.errors} errors, "
+            f"{self.isolated_timeouts} isolated timeouts.\n"
+            f"Latency: {average:.1f}ms average, {self.max_latency * 1000:.1f}ms max."
+        )
+
+
 class API:
     """
     Interact with WarnSystem from your cog.
@@ -169,12 +462,29 @@ class API:
         self.bot = bot
         self.data = config
         self.cache = cache
-        self.re_pool = Pool(maxtasksperchild=1000)
+        # started on the first regex search, closed after 10 minutes without search
+        # the number of processes is loaded from the config when the cog loads
+        self.re_pool = RegexPool(bot.loop, processes=2, idle_timeout=600)
         self.regex_timeout = 1
+        self.regex_pool_retries = 3  # see _safe_regex_search_all
+        self.temp_action_retry_delay = 60  # seconds before ending again a failed temp action
         self.warned_guilds = []  # see automod_check_for_autowarn
-        self.antispam = {}  # see automod_process_antispam
-        self.antispam_warn_queue = {}  # see automod_warn
-        self.automod_warn_task: asyncio.Task
+        # (guild ID, channel ID, member ID) > AntispamState, least recently active first
+        self.antispam = OrderedDict()  # see automod_process_antispam
+        self.antispam_max_size = 50000  # least recently active members are dropped first
+        self.antispam_sweep_interval = 60  # see automod_antispam_sweep_loop
+        self.antispam_sweep_task: asyncio.Task
+        # automatic warns waiting for a worker, see automod_warn_worker
+        # the queue is bounded, the antispam waits for a free slot during raids
+        self.automod_warn_queue = asyncio.Queue(maxsize=100)
+        self.automod_warn_pending = set()  # (guild ID, member ID) queued or being warned
+        self.automod_warn_workers = 3
+        self.automod_warn_tasks = []
+        self.warn_workers = 5  # number of members warned at the same time, see warn
+        self.embed_templates = {}  # (guild ID, level) > EmbedTemplate, see get_embeds
+        self.reason_substituters = {}  # guild ID > (settings, function), see format_reason
+        self.mute_setup_workers = 5  # channels edited at the same time, see setup_mute_channels
+        self.mute_setup_save_every = 25  # channels edited between two checkpoints
 
     def _get_datetime(self, time: int) -> datetime:
         return datetime.fromtimestamp(int(time))
@@ -230,33 +540,87 @@ class API:
         await self.cache.add_temp_action(guild, member, case)
         return True
 
+    async def _swap_roles(
+        self, member: discord.Member, remove: list, add: list, reason: Optional[str] = None
+    ) -> dict:
+        """
+        Remove and add roles to a member with a single member edit.
+
+        If the edit is refused (missing permissions, role hierarchy), the roles are removed and
+        added one by one, and a dict of the roles that still failed with their exception is
+        returned. Rate limits and Discord server errors are raised, retrying the roles one by
+        one would only send more requests to the same route.
+        """
+        remove = [x for x in remove if x in member.roles]
+        add = [x for x in add if x not in member.roles]
+        if not remove and not add:
+            return {}
+        roles = [x for x in member.roles if x not in remove and not x.is_default()] + add
+        try:
+            await member.edit(roles=roles, reason=reason)
+        except discord.errors.HTTPException as e:
+            if not self._is_refused(e):
+                raise
+            log.debug(
+                f"[Guild {member.guild.id}] Failed to edit the roles of {member} "
+                f"(ID: {member.id}) at once, trying one by one.",
+                exc_info=e,
+            )
+        else:
+            return {}
+        fails = {}
+        for role in remove:
+            try:
+                await member.remove_roles(role, reason=reason)
+            except discord.errors.HTTPException as e:
+                if not self._is_refused(e):
+                    raise
+                fails[role] = e
+        for role in add:
+            try:
+                await member.add_roles(role, reason=reason)
+            except discord.errors.HTTPException as e:
+                if not self._is_refused(e):
+                    raise
+                fails[role] = e
+        return fails
+
+    @staticmethod
+    def _is_refused(exception: discord.errors.HTTPException) -> bool:
+        # the request itself can't succeed, unlike a rate limit (429) or a server error (5xx)
+        return isinstance(exception, discord.errors.Forbidden) or exception.status in (400, 403)
+
+    def _log_role_fails(self, member: discord.Member, fails: Iterable[discord.Role], action: str):
+        log.warn(
+            f"[Guild {member.guild.id}] Failed to {action} roles of {member} (ID: {member.id}). "
+            f"Roles: {', '.join([f'{x.name} ({x.id})' for x in fails])}",
+        )
+
     async def _mute(self, member: discord.Member, reason: Optional[str] = None):
         """Mute an user on the guild."""
         old_roles = []
         guild = member.guild
         mute_role = guild.get_role(await self.cache.get_mute_role(guild))
-        remove_roles = await self.data.guild(guild).remove_roles()
+        remove_roles = (await self.cache.get_guild_settings(guild))["remove_roles"]
         if not mute_role:
             raise errors.MissingMuteRole("You need to create the mute role before doing this.")
         if remove_roles:
-            old_roles = member.roles.copy()
-            old_roles.remove(guild.default_role)
             old_roles = [
-                x for x in old_roles if x.position < guild.me.top_role.position and not x.managed
+                x
+                for x in member.roles
+                if not x.is_default()
+                and x.position < guild.me.top_role.position
+                and not x.managed
+                and x != mute_role
             ]
-            fails = []
-            for role in old_roles:
-                try:
-                    await member.remove_roles(role, reason=reason)
-                except discord.errors.HTTPException:
-                    fails.append(role)
-            if fails:
-                log.warn(
-                    f"[Guild {guild.id}] Failed to remove roles from {member} (ID: {member.id}) "
-                    f"while muting. Roles: {', '.join([f'{x.name} ({x.id})' for x in fails])}",
-                )
-        await member.add_roles(mute_role, reason=reason)
-        return old_roles
+        # the member gets the mute role and loses their roles in one request
+        fails = await self._swap_roles(member, old_roles, [mute_role], reason)
+        if mute_role in fails:
+            raise fails.pop(mute_role)
+        if fails:
+            self._log_role_fails(member, fails, "remove (while muting)")
+        # saved for the unmute, without the roles that couldn't be removed
+        return [x for x in old_roles if x not in fails]
 
     async def _unmute(self, member: discord.Member, reason: str, old_roles: list = None):
         """Unmute an user on the guild."""
@@ -266,8 +630,19 @@ class API:
             raise errors.MissingMuteRole(
                 f"Lost the mute role on guild {guild.name} (ID: {guild.id}"
             )
-        await member.remove_roles(mute_role, reason=reason)
-        await member.add_roles(*old_roles, reason=reason)
+        old_roles = old_roles or []
+        # roles that can't be assigned anymore would make the whole edit fail
+        lost_roles = [
+            x for x in old_roles if x.position >= guild.me.top_role.position or x.managed
+        ]
+        if lost_roles:
+            self._log_role_fails(member, lost_roles, "add back (while unmuting)")
+        old_roles = [x for x in old_roles if x not in lost_roles]
+        fails = await self._swap_roles(member, [mute_role], old_roles, reason)
+        if mute_role in fails:
+            raise fails.pop(mute_role)
+        if fails:
+            self._log_role_fails(member, fails, "add back (while unmuting)")
 
     async def _create_case(
         self,
@@ -280,6 +655,8 @@ class API:
         duration: Optional[timedelta] = None,
         roles: Optional[list] = None,
         modlog_message: Optional[discord.Message] = None,
+        batch: Optional[CaseBatch] = None,
+        modlog_summary: bool = False,
     ) -> dict:
         """Create a new case for a member. Don't call this, call warn instead."""
         data = {
@@ -297,8 +674,13 @@ class API:
                 "channel_id": modlog_message.channel.id,
                 "message_id": modlog_message.id,
             }
-        async with self.data.custom("MODLOGS", guild.id, user.id).x() as logs:
-            logs.append(data)
+            if modlog_summary:
+                # the message is shared by all the cases of the mass warn
+                data["modlog_message"]["modlog_summary"] = True
+        if batch:
+            await batch.add(user, data)
+        else:
+            await self.cache.add_case(guild, user, data)
         return data
 
     async def get_case(
@@ -347,7 +729,11 @@ class API:
             return case
 
     async def get_all_cases(
-        self, guild: discord.Guild, user: Optional[Union[discord.User, discord.Member]] = None
+        self,
+        guild: discord.Guild,
+        user: Optional[Union[discord.User, discord.Member]] = None,
+        *,
+        limit: Optional[int] = None,
     ) -> list:
         """
         Get all cases for a member of a guild.
@@ -359,6 +745,9 @@ class API:
         user: Optional[Union[discord.User, discord.Member]]
             The user you want to get the cases from. If this arguments is omitted, all cases of
             the guild are returned.
+        limit: Optional[int]
+            Only return the ``limit`` most recent cases. The guild's cases are indexed and kept
+            sorted in memory, so asking for a few cases is cheap, even on large guilds.
 
         Returns
         -------
@@ -399,25 +788,151 @@ class API:
                 }
         """
         if user:
-            return await self.data.custom("MODLOGS", guild.id, user.id).x()
-        logs = await self.data.custom("MODLOGS", guild.id).all()
-        all_cases = []
-        for member, content in logs.items():
-            if member == "x":
+            cases = await self.data.custom("MODLOGS", guild.id, user.id).x()
+            return cases[-limit:] if limit else cases
+        cases = await self.cache.get_guild_cases(guild)
+        if limit:
+            cases = cases[-limit:]
+        users = {}
+        return [self._format_guild_case(x[2], x[3], users) for x in cases]
+
+    def _get_user(self, user_id: Union[int, str], users: dict):
+        """Get a user or an UnavailableMember, resolving each ID only once."""
+        try:
+            return users[user_id]
+        except KeyError:
+            pass
+        try:
+            user = self.bot.get_user(int(user_id))
+        except ValueError:
+            user = None  # author can be a string for converted cases
+        # gotta get that state somehow
+        users[user_id] = user or UnavailableMember(self.bot, self.bot.user._state, user_id)
+        return users[user_id]
+
+    def _format_guild_case(self, member_id: int, case: dict, users: dict) -> dict:
+        case = dict(case)  # the indexed case must not be modified
+        if case["time"]:
+            case["time"] = self._get_datetime(case["time"])
+        case["member"] = self._get_user(member_id, users)
+        case["author"] = self._get_user(case["author"], users)
+        return case
+
+    async def iter_cases(
+        self,
+        guild: discord.Guild,
+        user: Optional[Union[discord.User, discord.Member]] = None,
+        *,
+        level: Optional[int] = None,
+        author: Optional[Union[discord.User, discord.Member, int]] = None,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        has_duration: Optional[bool] = None,
+        newest_first: bool = True,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate through the cases of a guild or a member, without loading them all at once.
+
+        Cases are formatted one by one when they are reached, so you can stop the iteration at
+        any time, or ask for a specific page with ``skip`` and ``limit``.
+
+        .. code-block:: python3
+
+            # the 10 last mutes of the guild
+            async for case in api.iter_cases(guild, level=2, limit=10):
+                print(case["member"], case["reason"])
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild where you want to get the cases from.
+        user: Optional[Union[discord.User, discord.Member]]
+            Only iterate through the cases of this member.
+        level: Optional[int]
+            Only yield the cases with this warning level.
+        author: Optional[Union[discord.User, discord.Member, int]]
+            Only yield the cases set by this moderator.
+        after: Optional[datetime]
+            Only yield the cases set on or after this date.
+        before: Optional[datetime]
+            Only yield the cases set before this date.
+        has_duration: Optional[bool]
+            If :py:obj:`True`, only yield temporary mutes and bans. If :py:obj:`False`, only
+            yield cases without a duration.
+        newest_first: bool
+            Iterate from the newest to the oldest case. Default to :py:obj:`True`.
+        skip: int
+            Number of matching cases to skip before yielding.
+        limit: Optional[int]
+            Maximum number of cases to yield.
+
+        Yields
+        ------
+        dict
+            A case, with the same body as the guild cases returned by
+            :func:`~warnsystem.api.API.get_all_cases` (including the ``member`` key).
+        """
+        if limit is not None and limit <= 0:
+            return
+        author_id = getattr(author, "id", author)
+        if user:
+            cases = [
+                (x["time"] or 0, 0, user.id, x) for x in await self.get_all_cases(guild, user)
+            ]
+            start, end = 0, len(cases)
+        else:
+            # live view of the index, our position is found again after each yield since the
+            # index can be edited meanwhile (see below)
+            cases = await self.cache.get_guild_cases(guild)
+            # the guild index is sorted, a binary search gives the bounds of the date range
+            start, end = 0, len(cases)
+            if after:
+                start = bisect.bisect_left(cases, (int(after.timestamp()),))
+            if before:
+                end = bisect.bisect_left(cases, (int(before.timestamp()),))
+        step = -1 if newest_first else 1
+        i = end - 1 if newest_first else start
+        if (level, author_id, has_duration) == (None, None, None) and not (
+            user and (after or before)
+        ):
+            # nothing left to filter, we can directly jump to the requested page
+            i += step * skip
+            skip = 0
+        users = {}
+        while 0 <= i < len(cases):
+            time, seq, member_id, case = cases[i]
+            i += step
+            if after and time < after.timestamp():
+                if user is None and newest_first:
+                    break  # sorted index, only older cases left
                 continue
-            for log in content["x"]:
-                time = log["time"]
-                if time:
-                    log["time"] = self._get_datetime(time)
-                # gotta get that state somehow
-                log["member"] = self.bot.get_user(int(member)) or UnavailableMember(
-                    self.bot, self.bot.user._state, member
-                )
-                log["author"] = self.bot.get_user(int(log["author"])) or UnavailableMember(
-                    self.bot, self.bot.user._state, log["author"]
-                )
-                all_cases.append(log)
-        return sorted(all_cases, key=lambda x: x["time"])  # sorted from oldest to newest
+            if before and time >= before.timestamp():
+                if user is None and not newest_first:
+                    break  # sorted index, only newer cases left
+                continue
+            if level is not None and case["level"] != level:
+                continue
+            if author_id is not None and str(case["author"]) != str(author_id):
+                continue
+            if has_duration is not None and bool(case["duration"]) is not has_duration:
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            yield self._format_guild_case(member_id, case, users)
+            if limit is not None:
+                limit -= 1
+                if limit <= 0:
+                    return
+            if user is None:
+                # cases may have been added, edited or removed while we yielded, find the next
+                # one from the (time, sequence) of the last case, which is unique in the index
+                if newest_first:
+                    i = bisect.bisect_left(cases, (time, seq)) - 1
+                else:
+                    i = bisect.bisect_left(cases, (time, seq + 1))
 
     async def edit_case(
         self,
@@ -458,8 +973,7 @@ class API:
         case = await self.get_case(guild, user, index)
         case["reason"] = new_reason
         case["time"] = int(case["time"].timestamp())
-        async with self.data.custom("MODLOGS", guild.id, user.id).x() as logs:
-            logs[index - 1] = case
+        await self.cache.edit_case(guild, user, index - 1, case)
         return True
 
     async def get_modlog_channel(
@@ -529,21 +1043,28 @@ class API:
                 raise errors.InvalidLevel(msg)
 
         if level == "all":
-            return await self.data.guild(guild).channels.all()
-        default_channel = await self.data.guild(guild).channels.main()
-        if level:
-            channel = await self.data.guild(guild).channels.get_raw(str(level))
-        else:
-            return default_channel
-
-        if not default_channel and not channel:
-            # warnsystem default channel doesn't exist, let's try to get Red's one
-            try:
-                return await get_red_modlog_channel(guild)
-            except RuntimeError:
-                raise errors.NotFound("No modlog found from WarnSystem or Red")
-
-        return self.bot.get_channel(channel if channel else default_channel)
+            return dict((await self.cache.get_guild_settings(guild))["channels"])
+        if not level:
+            return (await self.cache.get_guild_settings(guild))["channels"]["main"]
+
+        channel_id = self.cache.get_modlog_channel(guild, level)
+        if channel_id is False:
+            channel_id = await self._resolve_modlog_channel(guild, level)
+            self.cache.set_modlog_channel(guild, level, channel_id)
+        if channel_id is None:
+            raise errors.NotFound("No modlog found from WarnSystem or Red")
+        return self.bot.get_channel(channel_id)
+
+    async def _resolve_modlog_channel(self, guild: discord.Guild, level: int) -> Optional[int]:
+        channels = (await self.cache.get_guild_settings(guild))["channels"]
+        channel = channels[str(level)] or channels["main"]
+        if channel:
+            return channel
+        # warnsystem default channel doesn't exist, let's try to get Red's one
+        try:
+            return (await get_red_modlog_channel(guild)).id
+        except RuntimeError:
+            return None
 
     async def get_embeds(
         self,
@@ -599,13 +1120,11 @@ class API:
         if not reason:
             reason = _("No reason was provided.")
             mod_message = _("\nEdit this with `[p]warnings {id}`").format(id=member.id)
-        logs = await self.data.custom("MODLOGS", guild.id, member.id).x()
+        counts = await self.cache.get_case_counts(guild, member)
 
         # prepare the status field
-        total_warns = len(logs) + 1
-        total_type_warns = (
-            len([x for x in logs if x["level"] == level]) + 1
-        )  # number of warns of the received type
+        total_warns = sum(counts.values()) + 1
+        total_type_warns = counts.get(str(level), 0) + 1  # number of warns of the received type
 
         # a lambda that returns a string; if True is given, a third person sentence is returned
         # (modlog), if False is given, a first person sentence is returned (DM user)
@@ -620,16 +1139,15 @@ class API:
             action=action[1] if total_type_warns > 1 else action[0],
         )
 
+        # the parts depending on the settings only are ready, rebuilt if the settings changed
+        settings = await self.cache.get_guild_settings(guild)
+        template = self.embed_templates.get((guild.id, level))
+        if template is None or template.settings is not settings:
+            template = self.embed_templates[(guild.id, level)] = EmbedTemplate(settings, level)
+
         # we set any value that can be used multiple times
         invite = None
-        log_description = await self.data.guild(guild).embed_description_modlog.get_raw(level)
-        if "{invite}" in log_description:
-            try:
-                invite = await guild.create_invite(max_uses=1)
-            except Exception:
-                invite = _("*[couldn't create an invite]*")
-        user_description = await self.data.guild(guild).embed_description_user.get_raw(level)
-        if "{invite}" in user_description and not invite:
+        if template.needs_invite:
             try:
                 invite = await guild.create_invite(max_uses=1)
             except Exception:
@@ -642,67 +1160,79 @@ class API:
             duration = self._format_timedelta(time)
         else:
             duration = _("*[No time given]*")
+        values = {
+            "invite": lambda: invite,
+            "member": lambda: SafeMember(member),
+            "mod": lambda: SafeMember(author),
+            "duration": lambda: duration,
+            "time": lambda: today,
+        }
 
-        def format_description(text):
+        def format_description(text, fields):
             try:
-                return text.format(
-                    invite=invite,
-                    member=SafeMember(member),
-                    mod=SafeMember(author),
-                    duration=duration,
-                    time=today,
-                )
+                if fields is None:
+                    raise ValueError("Invalid description")
+                # only build the values used by the description
+                return text.format(**{x: values[x]() for x in fields if x in values})
             except Exception:
                 log.error(
                     f"[Guild {guild.id}] Failed to format description in embed", exc_info=True
                 )
                 return "Failed to format field."
 
-        link = re.search(r"(https?://)\S+\.(jpg|jpeg|png|gif|webm)", reason)
+        link = image_pattern.search(reason)
+        title = _("Level {level} warning ({action})").format(level=level, action=action[0])
 
         # embed for the modlog
-        log_embed = discord.Embed()
-        log_embed.set_author(name=f"{member.name} | {member.id}", icon_url=member.avatar_url)
-        log_embed.title = _("Level {level} warning ({action})").format(
-            level=level, action=action[0]
+        log_embed = discord.Embed(
+            title=title,
+            description=format_description(template.log_description, template.log_fields),
+            colour=template.colour,
         )
-        log_embed.description = format_description(log_description)
+        log_embed.url = template.url
+        log_embed.timestamp = date
+        log_embed.set_author(name=f"{member.name} | {member.id}", icon_url=member.avatar_url)
         log_embed.add_field(name=_("Member"), value=member.mention, inline=True)
         log_embed.add_field(name=_("Moderator"), value=author.mention, inline=True)
         if time:
             log_embed.add_field(name=_("Duration"), value=duration, inline=True)
         log_embed.add_field(name=_("Reason"), value=reason + mod_message, inline=False)
         log_embed.add_field(name=_("Status"), value=current_status(True), inline=False)
-        log_embed.timestamp = date
-        log_embed.set_thumbnail(url=await self.data.guild(guild).thumbnails.get_raw(level))
-        log_embed.colour = await self.data.guild(guild).colors.get_raw(level)
-        log_embed.url = await self.data.guild(guild).url()
+        log_embed.set_thumbnail(url=template.thumbnail)
         log_embed.set_image(url=link.group() if link else "")
         if not message_sent:
-            log_embed.description += _(
-                "\n\n***The message could not be delivered to the user. They may have DMs "
-                "disabled, blocked the bot, or may not have a mutual server.***"
-            )
+            self._mark_undelivered(log_embed)
 
-        # embed for the member in DM
-        user_embed = deepcopy(log_embed)
-        user_embed.set_author(name="")
-        user_embed.description = format_description(user_description)
-        if mod_message:
-            user_embed.set_field_at(3 if time else 2, name=_("Reason"), value=reason)
-        user_embed.remove_field(4 if time else 3)  # removes status field (gonna be added back)
-        user_embed.remove_field(0)  # removes member field
-        user_embed.add_field(name=_("Status"), value=current_status(False), inline=False)
+        # embed for the member in DM, built the same way
+        user_embed = discord.Embed(
+            title=title,
+            description=format_description(template.user_description, template.user_fields),
+            colour=template.colour,
+        )
+        user_embed.url = template.url
+        user_embed.timestamp = date
+        if template.show_mod:
+            user_embed.add_field(name=_("Moderator"), value=author.mention, inline=True)
         if time:
-            user_embed.set_field_at(
-                1, name=_("Duration"), value=self._format_timedelta(time), inline=True
-            )
-        if not await self.data.guild(guild).show_mod():
-            user_embed.remove_field(0)  # called twice, removing moderator field
+            user_embed.add_field(name=_("Duration"), value=duration, inline=True)
+        user_embed.add_field(name=_("Reason"), value=reason, inline=False)
+        user_embed.add_field(name=_("Status"), value=current_status(False), inline=False)
+        user_embed.set_thumbnail(url=template.thumbnail)
+        user_embed.set_image(url=link.group() if link else "")
 
         return (log_embed, user_embed)
 
-    async def maybe_create_mute_role(self, guild: discord.Guild) -> bool:
+    def _mark_undelivered(self, embed: discord.Embed):
+        embed.description += _(
+            "\n\n***The message could not be delivered to the user. They may have DMs "
+            "disabled, blocked the bot, or may not have a mutual server.***"
+        )
+
+    async def maybe_create_mute_role(
+        self,
+        guild: discord.Guild,
+        progress_tracker: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> bool:
         """
         Create the mod role for WarnSystem if it doesn't exist.
         This will also edit all channels to deny the following permissions to this role:
@@ -711,15 +1241,20 @@ class API:
         *   ``add_reactions``
         *   ``speak``
 
+        If the role exists but the edition of the channels was interrupted, it is resumed.
+
         Parameters
         ----------
         guild: discord.Guild
             The guild you want to set up the mute in.
+        progress_tracker: Optional[Callable[[int, int], Awaitable[None]]]
+            An async function (coroutine) called with the number of channels edited and the
+            total number of channels to edit. See :func:`~warnsystem.api.API.setup_mute_channels`.
 
         Returns
         -------
         Union[bool, list]
-            *   :py:obj:`False` if the role already exists.
+            *   :py:obj:`False` if the role already exists (and its setup was completed).
             *   :py:class:`list` if the role was created, with a list of errors for each channel.
                 Empty list means completly successful edition.
 
@@ -733,7 +1268,11 @@ class API:
         role = await self.cache.get_mute_role(guild)
         role = guild.get_role(role)
         if role:
-            return False
+            checkpoint = await self.data.guild(guild).mute_setup()
+            if not checkpoint or checkpoint["role"] != role.id:
+                return False
+            # the last setup was interrupted
+            return await self.setup_mute_channels(guild, role, progress_tracker)
 
         if not guild.me.guild_permissions.manage_roles:
             raise errors.MissingPermissions(
@@ -756,51 +1295,119 @@ class API:
                 "I can add it to muted members."
             ),
         )
-        perms = discord.PermissionOverwrite(send_messages=False, add_reactions=False, speak=False)
-        errors = []
-        for channel in guild.channels:
-            try:
-                await channel.set_permissions(
-                    target=role,
-                    overwrite=perms,
-                    reason=_(
-                        "Setting up WarnSystem mute. All muted members will have this role, "
-                        "feel free to edit its permissions."
-                    ),
-                )
-            except discord.errors.Forbidden:
-                errors.append(
-                    _(
-                        "Cannot edit permissions of the channel {channel} because of a "
-                        "permission error (probably enforced permission for `Manage channel`)."
-                    ).format(channel=channel.mention)
-                )
-            except discord.errors.HTTPException as e:
-                errors.append(
-                    _(
-                        "Cannot edit permissions of the channel {channel} because of "
-                        "an unknown error."
-                    ).format(channel=channel.mention)
-                )
-                log.warn(
-                    f"[Guild {guild.id}] Couldn't edit permissions of {channel} (ID: "
-                    f"{channel.id}) for setting up the mute role because of an HTTPException.",
-                    exc_info=e,
-                )
-            except Exception as e:
-                errors.append(
-                    _(
-                        "Cannot edit permissions of the channel {channel} because of "
-                        "an unknown error."
-                    ).format(channel=channel.mention)
-                )
-                log.error(
-                    f"[Guild {guild.id}] Couldn't edit permissions of {channel} (ID: "
-                    f"{channel.id}) for setting up the mute role because of an unknwon error.",
-                    exc_info=e,
-                )
+        # saved before editing the channels, so the setup can be resumed if interrupted
+        await self.data.guild(guild).mute_setup.set(
+            {"role": role.id, "channels": [x.id for x in guild.channels]}
+        )
         await self.cache.update_mute_role(guild, role)
-        return errors
+        return await self.setup_mute_channels(guild, role, progress_tracker)
+
+    async def setup_mute_channels(
+        self,
+        guild: discord.Guild,
+        role: discord.Role,
+        progress_tracker: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> list:
+        """
+        Deny the permissions of the mute role in all channels, a few channels at a time.
+
+        The channels left to edit are saved while this runs. If this is interrupted, calling
+        this again with the same role will only edit the remaining channels.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild you want to set up the mute in.
+        role: discord.Role
+            The mute role.
+        progress_tracker: Optional[Callable[[int, int], Awaitable[None]]]
+            An async function (coroutine) called with the number of channels edited and the
+            total number of channels to edit, each time a channel is edited.
+
+        Returns
+        -------
+        list
+            A list of errors for each channel. Empty list means completly successful edition.
+        """
+        checkpoint = await self.data.guild(guild).mute_setup()
+        if checkpoint and checkpoint["role"] == role.id:
+            remaining = set(checkpoint["channels"])
+            channels = [x for x in guild.channels if x.id in remaining]
+        else:
+            channels = list(guild.channels)
+        remaining = {x.id for x in channels}
+
+        async def save_checkpoint():
+            await self.data.guild(guild).mute_setup.set(
+                {"role": role.id, "channels": list(remaining)}
+            )
+
+        await save_checkpoint()
+        perms = discord.PermissionOverwrite(send_messages=False, add_reactions=False, speak=False)
+        fails = []
+        i = 0
+        total = len(channels)
+        channels = iter(channels)  # shared between the workers
+
+        async def worker():
+            nonlocal i
+            for channel in channels:
+                error = await self._set_mute_permissions(channel, role, perms)
+                if error:
+                    fails.append(error)
+                remaining.discard(channel.id)
+                i += 1
+                if i % self.mute_setup_save_every == 0:
+                    await save_checkpoint()
+                if progress_tracker:
+                    await progress_tracker(i, total)
+
+        await asyncio.gather(*[worker() for x in range(max(1, self.mute_setup_workers))])
+        await self.data.guild(guild).mute_setup.clear()
+        return fails
+
+    async def _set_mute_permissions(
+        self,
+        channel: discord.abc.GuildChannel,
+        role: discord.Role,
+        perms: discord.PermissionOverwrite,
+    ) -> Optional[str]:
+        """
+        Edit the permissions of the mute role in a channel, return an error message if it fails.
+        """
+        guild = channel.guild
+        try:
+            await channel.set_permissions(
+                target=role,
+                overwrite=perms,
+                reason=_(
+                    "Setting up WarnSystem mute. All muted members will have this role, "
+                    "feel free to edit its permissions."
+                ),
+            )
+        except discord.errors.Forbidden:
+            return _(
+                "Cannot edit permissions of the channel {channel} because of a "
+                "permission error (probably enforced permission for `Manage channel`)."
+            ).format(channel=channel.mention)
+        except discord.errors.HTTPException as e:
+            log.warn(
+                f"[Guild {guild.id}] Couldn't edit permissions of {channel} (ID: "
+                f"{channel.id}) for setting up the mute role because of an HTTPException.",
+                exc_info=e,
+            )
+            return _(
+                "Cannot edit permissions of the channel {channel} because of " "an unknown error."
+            ).format(channel=channel.mention)
+        except Exception as e:
+            log.error(
+                f"[Guild {guild.id}] Couldn't edit permissions of {channel} (ID: "
+                f"{channel.id}) for setting up the mute role because of an unknwon error.",
+                exc_info=e,
+            )
+            return _(
+                "Cannot edit permissions of the channel {channel} because of " "an unknown error."
+            ).format(channel=channel.mention)
 
     async def format_reason(self, guild: discord.Guild, reason: str = None) -> str:
         """
@@ -820,10 +1427,24 @@ class API:
         """
         if not reason:
             return
-        substitutions = await self.data.guild(guild).substitutions()
-        for key, substitute in substitutions.items():
-            reason = reason.replace(f"[{key}]", substitute)
-        return reason
+        # compiled once, rebuilt if the settings changed
+        settings = await self.cache.get_guild_settings(guild)
+        substituter = self.reason_substituters.get(guild.id)
+        if substituter is None or substituter[0] is not settings:
+            substituter = self.reason_substituters[guild.id] = (
+                settings,
+                self._compile_substitutions(settings["substitutions"]),
+            )
+        return substituter[1](reason)
+
+    def _compile_substitutions(self, substitutions: Mapping) -> Callable[[str], str]:
+        if not substitutions:
+            return str
+        # a single pass over the reason, whatever the number of substitutions
+        # names can contain any character, so they're all written in the pattern
+        pattern = re.compile(r"\[(%s)\]" % "|".join(re.escape(x) for x in substitutions))
+        replace = lambda match: substitutions[match.group(1)]
+        return functools.partial(pattern.sub, replace)
 
     async def warn(
         self,
@@ -840,6 +1461,8 @@ class API:
         take_action: Optional[bool] = True,
         automod: Optional[bool] = True,
         progress_tracker: Optional[Callable[[int], Awaitable[None]]] = None,
+        workers: Optional[int] = None,
+        modlog_summary: Optional[bool] = False,
     ) -> bool:
         """
         Set a warning on a member of a Discord guild and log it with the WarnSystem system.
@@ -908,11 +1531,21 @@ class API:
                     await asyncio.sleep(1)
 
                 await api.warn(guild, members, ctx.author, 1, progress_tracker=update_count)
+        workers: Optional[int]
+            The number of members warned at the same time. Default to
+            :py:attr:`~warnsystem.api.API.warn_workers` (5). When Discord rate limits the bot
+            on a type of action (DMs, bans, roles, modlog messages), all workers pause this action
+            until the rate limit ends.
+        modlog_summary: Optional[bool]
+            If set to :py:obj:`True` and multiple members are warned, a single message is sent
+            to the modlog channel once all members are warned, instead of one per member. It
+            contains a summary of the warning and a CSV file listing the members, and all cases
+            are associated to this message. Default to :py:obj:`False`.
 
         Returns
         -------
-        dict
-            A dict of members which couldn't be warned associated to the exception related.
+        list
+            A list of the exceptions of the members which couldn't be warned.
 
 
         Raises
@@ -959,7 +1592,7 @@ class API:
                         "the hierarchy so my top role ({bot_role}) is above {member_role}."
                     ).format(bot_role=guild.me.top_role.name, member_role=member.top_role.name)
                 )
-            if await self.data.guild(guild).respect_hierarchy() and (
+            if settings["respect_hierarchy"] and (
                 not (await self.bot.is_owner(author) or author.id == guild.owner_id)
                 and member.top_role.position >= author.top_role.position
             ):
@@ -982,23 +1615,18 @@ class API:
                 modlog_e, user_e = await self.get_embeds(
                     guild, member, author, level, reason, time, date
                 )
+            delivered = log_dm
             if log_dm:
                 try:
-                    await member.send(embed=user_e)
+                    await buckets.call("dm", member.send, embed=user_e)
                 except (discord.errors.Forbidden, errors.UserNotFound):
-                    modlog_e = (
-                        await self.get_embeds(
-                            guild, member, author, level, reason, time, date, message_sent=False
-                        )
-                    )[0]
+                    delivered = False
+                    self._mark_undelivered(modlog_e)
                 except discord.errors.NotFound:
                     raise
                 except discord.errors.HTTPException as e:
-                    modlog_e = (
-                        await self.get_embeds(
-                            guild, member, author, level, reason, time, date, message_sent=False
-                        )
-                    )[0]
+                    delivered = False
+                    self._mark_undelivered(modlog_e)
                     log.warn(
                         f"[Guild {guild.id}] Couldn't send a message to {member} "
                         f"(ID: {member.id}) because of an HTTPException.",
@@ -1009,28 +1637,32 @@ class API:
                 audit_reason = audit_reason.format(member=member)
                 try:
                     if level == 2:
-                        roles = await self._mute(member, audit_reason)
+                        roles = await buckets.call("roles", self._mute, member, audit_reason)
                     elif level == 3:
-                        await guild.kick(member, reason=audit_reason)
+                        await buckets.call("kick", guild.kick, member, reason=audit_reason)
                     elif level == 4:
-                        await guild.ban(
+                        await buckets.call(
+                            "ban",
+                            guild.ban,
                             member,
                             reason=audit_reason,
-                            delete_message_days=ban_days
-                            or await self.data.guild(guild).bandays.softban(),
+                            delete_message_days=ban_days or settings["bandays"]["softban"],
                         )
-                        await guild.unban(
+                        await buckets.call(
+                            "ban",
+                            guild.unban,
                             member,
                             reason=_(
                                 "Unbanning the softbanned member after cleaning up the messages."
                             ),
                         )
                     elif level == 5:
-                        await guild.ban(
+                        await buckets.call(
+                            "ban",
+                            guild.ban,
                             member,
                             reason=audit_reason,
-                            delete_message_days=ban_days
-                            or await self.data.guild(guild).bandays.ban(),
+                            delete_message_days=ban_days or settings["bandays"]["ban"],
                         )
                 except discord.errors.HTTPException as e:
                     log.warn(
@@ -1040,25 +1672,50 @@ class API:
                     )
                     return e
             # actions were taken, time to log
-            if log_modlog:
-                modlog_message = await mod_channel.send(embed=modlog_e)
+            if summary is not None:
+                # logged with the other members once the summary is sent
+                summary.append((member, roles, delivered))
             else:
-                modlog_message = None
+                if log_modlog:
+                    modlog_message = await buckets.call("modlog", mod_channel.send, embed=modlog_e)
+                else:
+                    modlog_message = None
+                await log_case(member, roles, modlog_message)
+            i += 1
+            if progress_tracker:
+                await progress_tracker(i)
+
+        async def log_case(
+            member: Union[discord.Member, UnavailableMember],
+            roles: list,
+            modlog_message: Optional[discord.Message],
+            modlog_summary: bool = False,
+        ):
             data = await self._create_case(
-                guild, member, author, level, date, reason, time, roles, modlog_message
+                guild,
+                member,
+                author,
+                level,
+                date,
+                reason,
+                time,
+                roles,
+                modlog_message,
+                batch,
+                modlog_summary,
             )
             # start timer if there is a temporary warning
             if time and (level == 2 or level == 5):
                 await self._start_timer(guild, member, data)
-            if automod:
+            if automod and batch:
+                # the case may not be saved yet, check once the batch is flushed
+                automod_members.append(member)
+            elif automod:
                 # This function can be pretty heavy, and the response can be seriously delayed
                 # because of this, so we make it a side process instead
                 self.bot.loop.create_task(
                     self.automod_check_for_autowarn(guild, member, author, level)
                 )
-            i += 1
-            if progress_tracker:
-                await progress_tracker(i)
 
         if not 1 <= level <= 5:
             raise errors.InvalidLevel("The level must be between 1 and 5.")
@@ -1125,9 +1782,116 @@ class API:
             date = datetime.utcnow()
 
         i = 0
-        fails = [await warn_member(x, audit_reason) for x in members if x]
+        fails = []
+        settings = await self.cache.get_guild_settings(guild)
+        buckets = RouteBuckets()
+        members = [x for x in members if x]
+        workers = max(1, min(len(members), workers or self.warn_workers))
+        # with multiple members, cases are saved together
+        batch = CaseBatch(self.cache, guild) if len(members) > 1 else None
+        # (member, roles, DM sent) of the members to log in the summary
+        summary = [] if log_modlog and modlog_summary and len(members) > 1 else None
+        automod_members = []
+        members = iter(members)  # shared between the workers
+        stop = False  # set if a worker fails, the others don't take new members
+
+        async def worker():
+            nonlocal stop
+            while not stop:
+                member = next(members, None)
+                if member is None:
+                    return
+                try:
+                    fail = await warn_member(member, audit_reason)
+                except Exception:
+                    stop = True
+                    raise
+                if fail:
+                    fails.append(fail)
+
+        tasks = [asyncio.ensure_future(worker()) for x in range(workers)]
+        try:
+            await asyncio.wait(tasks)
+        finally:
+            # the members being warned are finished, even if something went wrong, since
+            # actions may already be taken and must be logged
+            stop = True
+            if not all(task.done() for task in tasks):
+                await asyncio.wait(tasks)
+            if summary:
+                # actions were taken, they must be logged even if something went wrong
+                modlog_message = await self._send_modlog_summary(
+                    mod_channel, author, level, action, reason, time, date, summary, log_dm
+                )
+                for member, roles, delivered in summary:
+                    await log_case(member, roles, modlog_message, modlog_summary=True)
+            if batch:
+                # actions were taken, cases must be saved even if something went wrong
+                await batch.flush()
+        for member in automod_members:
+            self.bot.loop.create_task(
+                self.automod_check_for_autowarn(guild, member, author, level)
+            )
+        for task in tasks:
+            if task.exception():
+                raise task.exception()
         # all good!
-        return list(filter(None, fails))
+        return fails
+
+    async def _send_modlog_summary(
+        self,
+        channel: discord.TextChannel,
+        author: Union[discord.Member, str],
+        level: int,
+        action: str,
+        reason: Optional[str],
+        time: Optional[timedelta],
+        date: datetime,
+        summary: list,
+        log_dm: bool,
+    ) -> Optional[discord.Message]:
+        """
+        Send a single modlog message for a mass warn, with the list of members in a CSV file.
+        """
+        guild = channel.guild
+        settings = await self.cache.get_guild_settings(guild)
+        embed = discord.Embed(
+            title=_("Level {level} warning ({action})").format(level=level, action=action),
+            description=_(
+                "{total} members received this warning. The list is attached to this message."
+            ).format(total=len(summary)),
+            colour=settings["colors"][str(level)],
+        )
+        embed.url = settings["url"]
+        embed.timestamp = date
+        embed.add_field(name=_("Moderator"), value=author.mention, inline=True)
+        if time:
+            embed.add_field(name=_("Duration"), value=self._format_timedelta(time), inline=True)
+        reason = reason or _("No reason was provided.")
+        if len(reason) > 1024:  # embed limits
+            reason = reason[:1021] + "..."
+        embed.add_field(name=_("Reason"), value=reason, inline=False)
+        embed.set_thumbnail(url=settings["thumbnails"][str(level)])
+        text = StringIO()
+        writer = csv.writer(text)
+        writer.writerow(["member_id", "member", "dm_sent"] if log_dm else ["member_id", "member"])
+        for member, roles, delivered in summary:
+            row = [member.id, str(member)]
+            if log_dm:
+                row.append(delivered)
+            writer.writerow(row)
+        file = discord.File(
+            BytesIO(text.getvalue().encode("utf-8")),
+            f"level-{level}-warning-{date.strftime('%Y-%m-%d-%H-%M-%S')}.csv",
+        )
+        try:
+            return await channel.send(embed=embed, file=file)
+        except discord.errors.HTTPException as e:
+            log.error(
+                f"[Guild {guild.id}] Failed to send the modlog summary of a mass warn "
+                f"({len(summary)} members).",
+                exc_info=e,
+            )
 
     async def _check_endwarn(self):
         async def reinvite(guild, user, reason, duration):
@@ -1171,95 +1935,132 @@ class API:
                         f"(ID: {member.id}) after its temporary ban."
                     )
 
+        async def end_action(guild: discord.Guild, member_id: int, action: dict):
+            # returns the member to remove from the temp actions
+            try:
+                taken_on = self._get_datetime(action["time"])
+                duration = self._get_timedelta(action["duration"])
+            except (TypeError, ValueError) as e:
+                log.error(
+                    f"[Guild {guild.id}] Time or duration cannot be fetched. This is "
+                    "probably leftovers from the conversion of post 1.3 data. Removing the "
+                    f"temp warning, not taking actions... Member: {member_id}, data: {action}",
+                    exc_info=e,
+                )
+                return UnavailableMember(self.bot, guild._state, member_id)
+            author = guild.get_member(action["author"])
+            member = guild.get_member(member_id)
+            case_reason = action["reason"]
+            level = action["level"]
+            action_str = _("mute") if level == 2 else _("ban")
+            if not member:
+                member = UnavailableMember(self.bot, guild._state, member_id)
+                if level == 2:
+                    return member
+            roles = list(filter(None, [guild.get_role(x) for x in action.get("roles") or []]))
+
+            reason = _(
+                "End of timed {action} of {member} requested by {author} that lasted "
+                "for {time}. Reason of the {action}: {reason}"
+            ).format(
+                action=action_str,
+                member=member,
+                author=author if author else action["author"],
+                time=self._format_timedelta(duration),
+                reason=case_reason,
+            )
+            # end of warn
+            try:
+                if level == 2:
+                    await self._unmute(member, reason=reason, old_roles=roles)
+                if level == 5:
+                    await guild.unban(member, reason=reason)
+                    if (await self.cache.get_guild_settings(guild))["reinvite"]:
+                        await reinvite(
+                            guild,
+                            member,
+                            case_reason,
+                            self._format_timedelta(timedelta(seconds=action["duration"])),
+                        )
+            except discord.errors.Forbidden:
+                log.warn(
+                    f"[Guild {guild.id}] I lost required permissions for "
+                    f"ending the timed {action_str}. Member {member} (ID: {member.id}) "
+                    "will stay as it is now."
+                )
+            except discord.errors.HTTPException as e:
+                log.warn(
+                    f"[Guild {guild.id}] Couldn't end the timed {action_str} of {member} "
+                    f"(ID: {member.id}). He will stay as it is now.",
+                    exc_info=e,
+                )
+            else:
+                log.debug(
+                    f"[Guild {guild.id}] Ended timed {action_str} of {member} (ID: "
+                    f"{member.id}) taken on {self._format_datetime(taken_on)} requested "
+                    f"by {author} (ID: {action['author']}) that lasted for "
+                    f"{self._format_timedelta(duration)} for the reason {case_reason}"
+                    f"\nCurrent time: {now}\nExpected end time of warn: "
+                    f"{self._format_datetime(taken_on + duration)}"
+                )
+            return member
+
         now = datetime.utcnow()
-        for guild in self.bot.guilds:
-            data = await self.cache.get_temp_action(guild)
-            if not data:
+        # failed actions are scheduled again, like the old loop checking every action
+        retry_at = int(now.timestamp()) + self.temp_action_retry_delay
+        # only the actions that ended are returned, no need to check the others
+        for guild_id, data in self.cache.pop_ended_temp_actions(now.timestamp()).items():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                # the bot left the guild or it was deleted, nothing can be done there
+                # the actions stay saved and are scheduled again when the cog is loaded
+                log.warn(
+                    f"[Guild {guild_id}] Guild not found, {len(data)} temporary actions "
+                    "that ended can't be cancelled. They won't be checked again until the "
+                    "cog is reloaded."
+                )
+                continue
+            if guild.unavailable:
+                # Discord outage, the guild should come back
+                for member_id in data:
+                    self.cache.retry_temp_action(guild_id, member_id, retry_at)
                 continue
             to_remove = []
             for member_id, action in data.items():
-                member_id = int(member_id)
+                # one action failing must not prevent ending the others
                 try:
-                    taken_on = self._get_datetime(action["time"])
-                    duration = self._get_timedelta(action["duration"])
-                except ValueError as e:
+                    to_remove.append(await end_action(guild, int(member_id), action))
+                except Exception as e:
                     log.error(
-                        f"[Guild {guild.id}] Time or duration cannot be fetched. This is "
-                        "probably leftovers from the conversion of post 1.3 data. Removing the "
-                        f"temp warning, not taking actions... Member: {member_id}, data: {action}",
+                        f"[Guild {guild.id}] Failed to end the temporary action of member "
+                        f"{member_id}, trying again in {self.temp_action_retry_delay} "
+                        f"seconds. Data: {action}",
                         exc_info=e,
                     )
-                    to_remove.append(UnavailableMember(self.bot, guild._state, member_id))
-                    continue
-                author = guild.get_member(action["author"])
-                member = guild.get_member(member_id)
-                case_reason = action["reason"]
-                level = action["level"]
-                action_str = _("mute") if level == 2 else _("ban")
-                if not member:
-                    member = UnavailableMember(self.bot, guild._state, member_id)
-                    if level == 2:
-                        to_remove.append(member)
-                        continue
-                roles = list(filter(None, [guild.get_role(x) for x in action.get("roles") or []]))
-
-                reason = _(
-                    "End of timed {action} of {member} requested by {author} that lasted "
-                    "for {time}. Reason of the {action}: {reason}"
-                ).format(
-                    action=action_str,
-                    member=member,
-                    author=author if author else action["author"],
-                    time=self._format_timedelta(duration),
-                    reason=case_reason,
-                )
-                if (taken_on + duration) < now:
-                    # end of warn
-                    try:
-                        if level == 2:
-                            await self._unmute(member, reason=reason, old_roles=roles)
-                        if level == 5:
-                            await guild.unban(member, reason=reason)
-                            if await self.data.guild(guild).reinvite():
-                                await reinvite(
-                                    guild,
-                                    member,
-                                    case_reason,
-                                    self._format_timedelta(timedelta(seconds=action["duration"])),
-                                )
-                    except discord.errors.Forbidden:
-                        log.warn(
-                            f"[Guild {guild.id}] I lost required permissions for "
-                            f"ending the timed {action_str}. Member {member} (ID: {member.id}) "
-                            "will stay as it is now."
-                        )
-                    except discord.errors.HTTPException as e:
-                        log.warn(
-                            f"[Guild {guild.id}] Couldn't end the timed {action_str} of {member} "
-                            f"(ID: {member.id}). He will stay as it is now.",
-                            exc_info=e,
-                        )
-                    else:
-                        log.debug(
-                            f"[Guild {guild.id}] Ended timed {action_str} of {member} (ID: "
-                            f"{member.id}) taken on {self._format_datetime(taken_on)} requested "
-                            f"by {author} (ID: {author.id}) that lasted for "
-                            f"{self._format_timedelta(duration)} for the reason {case_reason}"
-                            f"\nCurrent time: {now}\nExpected end time of warn: "
-                            f"{self._format_datetime(taken_on + duration)}"
-                        )
-                    to_remove.append(member)
-            if to_remove:
+                    self.cache.retry_temp_action(guild.id, member_id, retry_at)
+            if not to_remove:
+                continue
+            try:
                 await self.cache.bulk_remove_temp_action(guild, to_remove)
+            except Exception as e:
+                log.error(
+                    f"[Guild {guild.id}] Failed to remove ended temporary actions, trying "
+                    f"again in {self.temp_action_retry_delay} seconds.",
+                    exc_info=e,
+                )
+                for member in to_remove:
+                    self.cache.retry_temp_action(guild.id, member.id, retry_at)
 
     async def _loop_task(self):
         """
         This is an infinite loop task started with the cog that will check\
         if a temporary warn (mute or ban) is over, and cancel the action if it's true.
 
-        The loop runs every 10 seconds.
+        The loop sleeps until the end of the next temporary warn, and wakes up earlier if\
+        a temporary warn ending before is added.
         """
         await self.bot.wait_until_ready()
+        await self.cache.init_temp_actions()
         log.debug(
             "Starting infinite loop for unmutes and unbans. Canel the "
             'task with bot.get_cog("WarnSystem").task.cancel()'
@@ -1283,7 +2084,17 @@ class API:
                 log.error(
                     "Error in loop for unmutes and unbans. The loop will be resumed.", exc_info=e
                 )
-            await asyncio.sleep(10)
+            await self._wait_for_next_endwarn()
+
+    async def _wait_for_next_endwarn(self):
+        event = self.cache.temp_actions_updated
+        event.clear()
+        end = self.cache.next_temp_action_end()
+        timeout = None if end is None else max(0, end - datetime.utcnow().timestamp())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
 
     # automod stuff
     def enable_automod(self):
@@ -1292,7 +2103,11 @@ class API:
         """
         log.info("Enabling automod listeners and event loops.")
         self.bot.add_listener(self.automod_on_message, name="on_message")
-        self.automod_warn_task = self.bot.loop.create_task(self.automod_warn_loop())
+        self.automod_warn_tasks = [
+            self.bot.loop.create_task(self.automod_warn_worker())
+            for x in range(self.automod_warn_workers)
+        ]
+        self.antispam_sweep_task = self.bot.loop.create_task(self.automod_antispam_sweep_loop())
 
     def disable_automod(self):
         """
@@ -1300,8 +2115,11 @@ class API:
         """
         log.info("Disabling automod listeners and event loops.")
         self.bot.remove_listener(self.automod_on_message, name="on_message")
-        if hasattr(self, "automod_warn_task"):
-            self.automod_warn_task.cancel()
+        for task in self.automod_warn_tasks:
+            task.cancel()
+        self.automod_warn_tasks = []
+        if hasattr(self, "antispam_sweep_task"):
+            self.antispam_sweep_task.cancel()
 
     async def _check_if_automod_valid(self, message: discord.Message):
         guild = message.guild
@@ -1314,11 +2132,12 @@ class API:
             return False
         if not self.cache.is_automod_enabled(guild):
             return False
-        if await self.bot.is_automod_immune(message):
-            return False
-        if await self.bot.is_mod(member):
-            return False
-        return True
+        # this runs for every message, the result of the checks below is cached
+        immune = self.cache.get_automod_immunity(guild, member)
+        if immune is None:
+            immune = await self.bot.is_automod_immune(message) or await self.bot.is_mod(member)
+            self.cache.set_automod_immunity(guild, member, immune)
+        return not immune
 
     async def automod_on_message(self, message: discord.Message):
         if not await self._check_if_automod_valid(message):
@@ -1357,34 +2176,26 @@ class API:
         """
         Mostly safe regex search to prevent reDOS from user defined regex patterns
 
-        This works by running the regex pattern inside a process pool defined at the
-        cog level and then checking that process in the default executor to keep
-        things asynchronous. If the process takes too long to complete we log a
-        warning and remove the trigger from trying to run again.
+        This works by running the regex pattern inside a new process (see
+        `RegexPool.run_isolated`) and then checking that process in the default executor to keep
+        things asynchronous. The searches of the shared pool are not affected. If the process
+        takes too long to complete, we log a warning and remove the trigger from trying to run
+        again.
 
         This function was fully made by TrustyJAID for Trusty-cogs/retrigger (amazing cog btw)
         https://github.com/TrustyJAID/Trusty-cogs/blob/f08a88040dcc67291a463517a70dcbbe702ba8e3/retrigger/triggerhandler.py#L494
         """
         guild = message.guild
         try:
-            process = self.re_pool.apply_async(regex.findall, (message.content,))
-            task = functools.partial(process.get, timeout=self.regex_timeout)
-            new_task = self.bot.loop.run_in_executor(None, task)
-            search = await asyncio.wait_for(new_task, timeout=self.regex_timeout + 5)
-        except TimeoutError:
-            error_msg = (
+            search = await self.re_pool.run_isolated(
+                regex.findall, (message.content,), self.regex_timeout
+            )
+        except (TimeoutError, asyncio.TimeoutError):
+            log.warning(
                 f"[Guild {guild.id}] Automod: regex process took too long. "
                 f"Removing from memory. Offending regex: {regex.pattern}"
             )
-            log.warning(error_msg)
-            return (False, [])
             # we certainly don't want to be performing multiple triggers if this happens
-        except asyncio.TimeoutError:
-            error_msg = (
-                f"[Guild {guild.id}] Automod: regex asyncio timed out. "
-                f"Removing from memory. Offending regex: {regex.pattern}"
-            )
-            log.warning(error_msg)
             return (False, [])
         except Exception:
             log.error(
@@ -1395,15 +2206,79 @@ class API:
         else:
             return (True, search)
 
+    async def _safe_regex_search_all(
+        self, patterns: tuple, message: discord.Message
+    ) -> Optional[list]:
+        """
+        Same as `_safe_regex_search`, but runs all the patterns in a single task of the shared
+        pool.
+
+        Returns the result of ``findall`` for each pattern, or `None` if the whole search took
+        too long or failed. The offending pattern is unknown at this point. A search
+        interrupted by the timeout of another guild's search is tried again.
+        """
+        guild = message.guild
+        for attempt in range(self.regex_pool_retries):
+            try:
+                # one chunk for all patterns, so they're sent to one process at once
+                return await self.re_pool.run(
+                    "starmap_async",
+                    re.Pattern.findall,
+                    [(x, message.content) for x in patterns],
+                    self.regex_timeout,
+                    chunksize=len(patterns),
+                )
+            except RegexPoolRestarted:
+                log.debug(
+                    f"[Guild {guild.id}] Automod: regex search interrupted by a pool restart. "
+                    "Trying again."
+                )
+            except (TimeoutError, asyncio.TimeoutError):
+                log.warning(
+                    f"[Guild {guild.id}] Automod: regex process took too long. "
+                    "Searching the patterns one by one to find the offending regex."
+                )
+                return None
+            except Exception:
+                log.error(
+                    f"[Guild {guild.id}] Automod regex encountered an error. "
+                    "Searching the patterns one by one to find the offending regex.",
+                    exc_info=True,
+                )
+                return None
+        log.warning(
+            f"[Guild {guild.id}] Automod: regex search interrupted {self.regex_pool_retries} "
+            "times by pool restarts. Searching the patterns one by one."
+        )
+        return None
+
     async def automod_process_regex(self, message: discord.Message):
         guild = message.guild
         member = message.author
         all_regex = await self.cache.get_automod_regex(guild)
-        for name, regex in all_regex.items():
-            result = await self._safe_regex_search(regex["regex"], message)
-            if not result[1]:
-                if result[0] is False:
-                    await self.cache.remove_automod_regex(guild, name)
+        if not all_regex:
+            return
+        version, names, patterns = await self.cache.get_automod_regex_matcher(guild)
+        # spam usually repeats the same content, no need to search it again
+        key = self.cache.get_automod_regex_result_key(guild, version, message.content)
+        results = self.cache.get_automod_regex_result(key)
+        if results is None:
+            results = await self._safe_regex_search_all(patterns, message)
+            if results is not None:
+                results = tuple(bool(x) for x in results)
+                self.cache.set_automod_regex_result(key, results)
+            else:
+                # each pattern is searched in its own process, a trigger is only removed if it
+                # times out there (see _safe_regex_search)
+                results = []
+                for name, pattern in zip(names, patterns):
+                    result = await self._safe_regex_search(pattern, message)
+                    if result[0] is False:
+                        await self.cache.remove_automod_regex(guild, name)
+                    results.append(bool(result[1]))
+        for name, matched in zip(names, results):
+            regex = all_regex.get(name)
+            if not matched or regex is None:
                 continue
             time = None
             if regex["time"]:
@@ -1428,8 +2303,8 @@ class API:
 
     async def automod_process_antispam(self, message: discord.Message):
         # we store the data in self.antispam
-        # keys are as follow: GUILD_ID > CHANNEL_ID > MEMBER_ID = tuple
-        # tuple contains list timestamps of recent messages + check if the member was warned
+        # keys are (GUILD_ID, CHANNEL_ID, MEMBER_ID), values are AntispamState
+        # the state keeps the timestamps of recent messages + when the member was warned
         # if the antispam is triggered once, we send a message in the chat (refered as text warn)
         # if it's triggered a second time, an actual warn is given
         guild = message.guild
@@ -1438,107 +2313,103 @@ class API:
         antispam_data = await self.cache.get_automod_antispam(guild)
         if antispam_data is False:
             return
-        for word in antispam_data["whitelist"]:
-            if word in message.content:
-                return
-
-        # we slowly go across each key, if it doesn't exist, data is created then the
-        # function ends since there's no data to check
-        InitialData = namedtuple("InitialData", ["messages", "warned"])
-        data = InitialData(messages=[], warned=False)
-        try:
-            guild_data = self.antispam[guild.id]
-        except KeyError:
-            self.antispam[guild.id] = {channel.id: {member.id: data}}
+        whitelist = antispam_data["whitelist_pattern"]
+        if whitelist is not None and whitelist.search(message.content):
             return
-        else:
-            pass
-        try:
-            channel_data = guild_data[channel.id]
-        except KeyError:
-            self.antispam[guild.id][channel.id] = {member.id: data}
-            return
-        else:
-            del guild_data
-        try:
-            data = channel_data[member.id]
-        except KeyError:
-            pass
-        del channel_data
 
-        data.messages.append(message.created_at)
-        # now we've got our list of timestamps, just gotta clean the old ones
-        data = data._replace(
-            messages=self._automod_clean_old_messages(
-                antispam_data["delay"], message.created_at, data.messages
-            )
-        )
-        if len(data.messages) <= antispam_data["max_messages"]:
+        key = (guild.id, channel.id, member.id)
+        max_messages = antispam_data["max_messages"]
+        data = self.antispam.get(key)
+        if data is None:
+            data = self.antispam[key] = AntispamState(max_messages)
+            if len(self.antispam) > self.antispam_max_size:
+                self.antispam.popitem(last=False)
+        else:
+            self.antispam.move_to_end(key)
+            if data.messages.maxlen != max_messages + 1:
+                # threshold edited
+                data.messages = deque(data.messages, maxlen=max_messages + 1)
+        now = message.created_at.timestamp()
+        data.messages.append(now)
+        data.last_message = now
+        # the oldest message is dropped by the deque, the spam is detected if the first one
+        # of the last max_messages + 1 messages is within the delay
+        if len(data.messages) <= max_messages or now - data.messages[0] > antispam_data["delay"]:
             # antispam not triggered, we can exit now
-            self.antispam[guild.id][channel.id][member.id] = data
             return
         # at this point, user is considered to be spamming
         # we cleanup his x last messages (max_messages + 1), then either send a text warn
         # or perform an actual warnsystem warn (I'm confusing ik)
-        if (
-            data.warned is False
-            or (datetime.now() - data.warned).total_seconds()
-            < antispam_data["delay_before_action"]
-        ):
+        data.messages.clear()
+        if data.warned is None or now - data.warned > antispam_data["delay_before_action"]:
             bot_message = await channel.send(
                 _("{member} you're sending messages too fast!").format(member=member.mention),
                 delete_after=5,
             )
-            data = InitialData(messages=[], warned=bot_message.created_at)
+            data.warned = bot_message.created_at.timestamp()
         else:
             # already warned once within delay_before_action, gotta take actions
-            warn_data = antispam_data["warn"]
-            warn_data["author"] = guild.me
+            # copied, the cached settings must not be modified
+            warn_data = dict(antispam_data["warn"], author=guild.me)
             if warn_data["time"]:
                 warn_data["time"] = self._get_timedelta(warn_data["time"])
-            try:
-                self.antispam_warn_queue[guild.id][member] = warn_data
-            except KeyError:
-                self.antispam_warn_queue[guild.id] = {member: warn_data}
-            # also reset the data
-            data = InitialData(messages=[], warned=message.created_at)
-        self.antispam[guild.id][channel.id][member.id] = data
-
-    def _automod_clean_old_messages(self, delay: int, current_time: datetime, messages: list):
+            data.warned = now
+            await self.queue_automod_warn(member, warn_data)
+
+    def _automod_sweep_antispam(self):
         """
-        We don't keep messages older than the delay in the cache
+        Remove the members who didn't send a message within the antispam delay, and whose text
+        warn expired.
         """
-        message: datetime
-        delta: timedelta
-        new_list = []
-        for message in messages:
-            delta = current_time - message
-            if delta.total_seconds() <= delay:
-                new_list.append(message)
-        return new_list
-
-    def _automod_clean_cache(
-        self, guild: discord.Guild, channel: discord.TextChannel, member: discord.Member
-    ):
+        now = datetime.utcnow().timestamp()
+        to_remove = []
+        for key, data in self.antispam.items():
+            settings = self.cache.automod_antispam.get(key[0])
+            if not settings:
+                # antispam disabled
+                to_remove.append(key)
+                continue
+            if now - data.last_message <= settings["delay"]:
+                continue
+            if data.warned is not None and now - data.warned <= settings["delay_before_action"]:
+                continue
+            to_remove.append(key)
+        for key in to_remove:
+            del self.antispam[key]
+        return len(to_remove)
+
+    async def automod_antispam_sweep_loop(self):
         """
-        We quickly end up with a dict filled with empty values, we gotta clean that.
+        Regularly drop idle members from the antispam data and expired automod immunities, they
+        would grow forever otherwise.
         """
-        del self.automod[guild.id][channel.id][member.id]
-        if not self.automod[guild.id][channel.id]:
-            del self.automod[guild.id][channel.id]
-            if not self.automod[guild.id]:
-                del self.automod[guild.id]
+        while True:
+            await asyncio.sleep(self.antispam_sweep_interval)
+            try:
+                removed = self._automod_sweep_antispam()
+                expired = self.cache.prune_automod_immunity()
+            except Exception as e:
+                log.error(
+                    "Error in loop for antispam cleanup. The loop will be resumed.", exc_info=e
+                )
+            else:
+                log.debug(
+                    f"Antispam cleanup: {removed} idle members removed, "
+                    f"{len(self.antispam)}/{self.antispam_max_size} members tracked, "
+                    f"{expired} expired automod immunities removed."
+                )
 
     async def automod_check_for_autowarn(
         self, guild: discord.Guild, member: discord.Member, author: discord.Member, level: int
     ):
         """
-        Iterate through member's modlog, looking for possible automatic warns.
+        Look for possible automatic warns, using the member's warning counters.
 
         Level is the last warning's level, which will filter a lot of possible autowarns and,
         therefore, save performances.
 
-        This can be a heavy call if there are a lot of possible autowarns and a long modlog.
+        The first call for a member loads their modlog to build the counters, next calls
+        only update them.
         """
         t = datetime.now()
         try:
@@ -1567,10 +2438,7 @@ class API:
         # so we look for conditions that confirms the member cannot be affected by automod
         if await self.bot.is_automod_immune(member):
             return
-        warns = await self.get_all_cases(guild, member)
-        if len(warns) < 2:
-            return  # autowarn can't be triggered with a single warning in the modlog
-        autowarns = await self.data.guild(guild).automod.warnings()
+        autowarns = await self.cache.get_automod_warnings(guild)
         # remove all autowarns that are locked to a specific level
         # where the last warning's level doesn't correspond
         # also remove autowarns that are automod only if warn author isn't the bot
@@ -1580,44 +2448,19 @@ class API:
                 return False
             return warn["level"] == 0 or warn["level"] == level
 
-        autowarns = list(filter(is_autowarn_valid, autowarns))
-        if not autowarns:
-            return  # no autowarn to iterate through
-        for i, autowarn in enumerate(autowarns):
-            # prepare for iteration
-            autowarns[i]["count"] = 0
-            # if the condition is met (within the specified time? not an automatic warn?)
-            # we increase this value until reaching the given limit
-            time = autowarn["time"]
-            if time:
-                until = datetime.utcnow() - timedelta(seconds=time)
-                autowarns[i]["until"] = until
-        del time
-        found_warnings = {}  # we fill this list with the valid autowarns, there can be more than 1
-        for warn in warns[::-1]:
-            to_remove = []  # list of autowarns to remove during the iteration (duration expired)
-            taken_on = datetime.fromtimestamp(warn["time"])
-            for i, autowarn in enumerate(autowarns):
-                try:
-                    if autowarn["until"] >= taken_on:
-                        to_remove.append(i)
-                        continue
-                except KeyError:
-                    pass
-                autowarns[i]["count"] += 1
-                if autowarns[i]["count"] == autowarn["number"]:
-                    found_warnings[i] = autowarn["warn"]
-                if autowarns[i]["count"] > autowarn["number"]:
-                    # value exceeded, no need to continue, it's already done for this one warn
-                    to_remove.append(i)
-                    del found_warnings[i]
-            for index in reversed(to_remove):
-                autowarns.pop(index)
-            if not autowarns:
-                # we could be out of autowarns to check after a certain time
-                # no need to continue the iteration
-                break
-        del to_remove, taken_on, autowarns
+        valid = [i for i, x in enumerate(autowarns) if is_autowarn_valid(x)]
+        if not valid:
+            return  # no autowarn to check
+        # number of warnings within the time of each autowarn, kept updated by the cache
+        # an autowarn is triggered when this number is exactly reached
+        counts = await self.cache.get_autowarn_counts(guild, member)
+        found_warnings = {
+            i: autowarns[i]["warn"] for i in valid if counts[i] == autowarns[i]["number"]
+        }
+        if not found_warnings:
+            return
+        if sum((await self.cache.get_case_counts(guild, member)).values()) < 2:
+            return  # autowarn can't be triggered with a single warning in the modlog
         for i, warn in found_warnings.items():
             try:
                 await self.warn(
@@ -1640,54 +2483,45 @@ class API:
                     f"warn {i} on member {member} ({member.id})."
                 )
 
-    async def automod_warn_loop(self):
+    async def queue_automod_warn(self, member: discord.Member, data: dict) -> bool:
+        """
+        Queue an automatic warn, performed as soon as a worker is free.
+
+        Returns :py:obj:`False` if a warn for this member is already queued or running. If the
+        queue is full, this waits for a free slot.
+        """
         # since this is asyncronous code, sometimes there can be too many warnings performed
         # especially with message antispam, since it treats multiple messages simultaneously
-        # instead, we have a dict of warnings to perform, and we remove it only once the warn is
-        # done. That way, duplicate warnings won't happen.
+        # a member is kept in the pending set until the warn is done, that way, duplicate
+        # warnings won't happen.
+        key = (member.guild.id, member.id)
+        if key in self.automod_warn_pending:
+            return False
+        self.automod_warn_pending.add(key)
+        await self.automod_warn_queue.put((member, data))
+        return True
 
-        async def warn(member: discord.Member, data: dict):
+    async def automod_warn_worker(self):
+        queue = self.automod_warn_queue
+        while True:
+            member, data = await queue.get()
             guild = member.guild
             try:
-                await self.warn(guild, [member], **data)
+                fails = await self.warn(guild, [member], **data)
             except Exception as e:
                 log.error(
                     f"Cannot perform autowarn on member {member} ({member.id}). Data: {data}",
                     exc_info=e,
                 )
-            finally:
-                await asyncio.sleep(1)
-                del self.antispam_warn_queue[guild.id][member]
-                if not self.antispam_warn_queue[guild.id]:
-                    del self.antispam_warn_queue[guild.id]
-
-        async def loop():
-            guild: discord.Guild
-            member: discord.Member
-            coros = []
-            for guild_id, data in self.antispam_warn_queue.items():
-                for member, value in data.items():
-                    coros.append(warn(member, value))
-            coros = asyncio.gather(*coros, return_exceptions=True)
-            await coros
-
-        errors = 0
-        while True:
-            try:
-                await loop()
-            except Exception as e:
-                errors += 1
-                if errors >= 3:
-                    # more than 3 errors in our loop, let's shut down the loop
-                    log.critical(
-                        "The loop for automod warnings encountered a third error. To prevent "
-                        "more damages, the loop will be cancelled. Timed mutes and bans no longer "
-                        "works for now. Reload the cog to start the loop back. If the problem "
-                        "persists, report the error and update the cog.",
-                        exc_info=e,
+            else:
+                if fails:
+                    log.error(
+                        f"Cannot perform autowarn on member {member} ({member.id}). Data: {data}",
+                        exc_info=fails[0],
                     )
-                    return
-                log.error(
-                    "Error in loop for automod warnings. The loop will be resumed.", exc_info=e
+            finally:
+                queue.task_done()
+                # warns triggered by the messages processed meanwhile are still ignored
+                self.bot.loop.call_later(
+                    1, self.automod_warn_pending.discard, (guild.id, member.id)
                 )
-            await asyncio.sleep(1)
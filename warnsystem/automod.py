@@ -426,6 +426,7 @@ set him a level 3 warning with the given reason.
                     },
                 }
             )
+        await self.cache.update_automod_warnings(guild)
         await ctx.send(_("The new automatic warn was successfully saved!"))
 
     @automod_warn.command(name="delete", aliases=["del", "remove"])
@@ -470,6 +471,7 @@ set him a level 3 warning with the given reason.
                 await ctx.send(_("The auto warn wasn't deleted."))
                 return
             warnings.pop(index)
+        await self.cache.update_automod_warnings(guild)
         await ctx.send(_("Automated warning successfully deleted."))
 
     @automod_warn.command(name="list")
@@ -702,7 +704,7 @@ automod infractions, like a mute after 3 warns.
                     await ctx.send(_("`{word}` is already in the whitelist.").format(word=word))
                     return
             whitelist.extend(words)
-        await self.cache.update_automod_antispam()
+        await self.cache.update_automod_antispam(guild)
         if len(words) == 1:
             await ctx.send(_("Added one word to the whitelist."))
         else:
@@ -724,8 +726,8 @@ automod infractions, like a mute after 3 warns.
                 if word not in whitelist:
                     await ctx.send(_("`{word}` isn't in the whitelist.").format(word=word))
                     return
-            whitelist = [x for x in whitelist if x not in words]
-        await self.cache.update_automod_antispam()
+            whitelist[:] = [x for x in whitelist if x not in words]
+        await self.cache.update_automod_antispam(guild)
         if len(words) == 1:
             await ctx.send(_("Removed one word from the whitelist."))
         else:
@@ -754,7 +756,7 @@ automod infractions, like a mute after 3 warns.
         """
         guild = ctx.guild
         await self.data.guild(guild).automod.antispam.whitelist.set([])
-        await self.cache.update_automod_antispam()
+        await self.cache.update_automod_antispam(guild)
         await ctx.tick()
 
     @automod_antispam.command(name="info")
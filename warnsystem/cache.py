@@ -1,12 +1,21 @@
+import asyncio
+import bisect
 import discord
+import hashlib
+import heapq
 import logging
 import contextlib
 import re
+import time
 
+from collections import Counter, OrderedDict, defaultdict, deque
+from datetime import datetime
+from itertools import count
 from redbot.core import Config
 from redbot.core.bot import Red
 
-from typing import Mapping, Optional
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
 
 log = logging.getLogger("red.laggron.warnsystem")
 
@@ -22,11 +31,40 @@ class MemoryCache:
         self.data = config
 
         self.mute_roles = {}
+        self.guild_settings = {}  # see get_guild_settings
+        self.modlog_channels = {}  # guild ID > level > resolved channel ID, see get_modlog_channel
         self.temp_actions = {}
+        # (end time, guild ID, member ID) of all temp actions, the next one to end is first
+        # items are not removed with the action, they're skipped when they're popped
+        self.temp_actions_heap = []
+        self.temp_actions_updated = asyncio.Event()  # set when an earlier action is added
         self.automod_enabled = []
         self.automod_antispam = {}
         self.automod_regex = {}
+        self.automod_regex_matchers = {}  # see get_automod_regex_matcher
+        self._automod_regex_versions = count()
+        # (guild ID, matcher version, content digest) > matched triggers, least recently used first
+        self.automod_regex_results = OrderedDict()
+        self.automod_regex_results_size = 1024
         self.automod_regex_edited = []
+        self.automod_warnings = {}  # guild ID > list of autowarns
+        # guild ID > member ID > one deque per autowarn, with the times of the cases counted
+        # see get_autowarn_counts
+        self.autowarn_windows = {}
+        # guild ID > member ID > (immune to automod, expiration), see get_automod_immunity
+        self.automod_immunity = {}
+        # mod roles and immune IDs can be edited without us knowing (other cogs, Config)
+        self.automod_immunity_ttl = 300
+        # hits and misses of the cached getters, by name of the cached value
+        # a guild without data is cached too (empty dict), that's a hit
+        self.hits = Counter()
+        self.misses = Counter()
+
+        # guild ID > list of (time, sequence, member ID, case) sorted from oldest to newest
+        # the sequence number keeps the order of cases sharing the same timestamp
+        self.modlogs = {}
+        self._modlogs_seq = count()
+        self._modlogs_locks = defaultdict(asyncio.Lock)
 
     async def init_automod_enabled(self):
         for guild_id, data in (await self.data.all_guilds()).items():
@@ -47,19 +85,154 @@ class MemoryCache:
         config_data = await self.data.all_guilds()
         mute_roles_cached = len(self.mute_roles)
         mute_roles = len([x for x in config_data.values() if x["mute_role"] is not None])
-        guild_temp_actions_cached = len(self.temp_actions)
+        guild_temp_actions_cached = len([x for x in self.temp_actions.values() if x])
+        guild_temp_actions_empty = len(self.temp_actions) - guild_temp_actions_cached
         guild_temp_actions = len([x for x in config_data.values() if x["temporary_warns"]])
         temp_actions_cached = sum(len(x) for x in self.temp_actions.values())
         temp_actions = sum((len(x["temporary_warns"]) for x in config_data.values()))
+        guild_modlogs_cached = len(self.modlogs)
+        cases_cached = sum(len(x) for x in self.modlogs.values())
+        guild_regex_cached = len([x for x in self.automod_regex.values() if x])
+        guild_regex_empty = len(self.automod_regex) - guild_regex_cached
+        stats = "\n".join(
+            f"{name}: {self.hits[name]} hits, {self.misses[name]} misses "
+            f"({self.hits[name] / ((self.hits[name] + self.misses[name]) or 1):.0%} hit rate)."
+            for name in sorted(set(self.hits) | set(self.misses))
+        )
         text = (
             f"Debug info requested\n"
             f"{mute_roles_cached}/{mute_roles} mute roles loaded in cache.\n"
             f"{guild_temp_actions_cached}/{guild_temp_actions} guilds with temp actions loaded in cache.\n"
-            f"{temp_actions_cached}/{temp_actions} temporary actions loaded in cache."
+            f"{temp_actions_cached}/{temp_actions} temporary actions loaded in cache.\n"
+            f"{guild_temp_actions_empty} guilds without temp actions cached.\n"
+            f"{guild_regex_cached} guilds with regex and {guild_regex_empty} without regex cached.\n"
+            f"{cases_cached} cases of {guild_modlogs_cached} guilds indexed in cache.\n"
+            f"{stats or 'No cache stats yet.'}"
         )
         log.info(text)
         return text
 
+    # settings read when warning, replaced after each warnset command (see cog_after_invoke)
+    guild_settings_keys = (
+        "bandays",
+        "channels",
+        "colors",
+        "embed_description_modlog",
+        "embed_description_user",
+        "reinvite",
+        "remove_roles",
+        "respect_hierarchy",
+        "show_mod",
+        "substitutions",
+        "thumbnails",
+        "url",
+    )
+
+    async def get_guild_settings(self, guild: discord.Guild) -> Mapping:
+        """
+        Return a read-only snapshot of the guild settings used when warning.
+
+        The snapshot is built with a single Config call and kept until
+        :meth:`invalidate_guild_settings` is called. Nested values are shared, don't modify them.
+        """
+        settings = self.guild_settings.get(guild.id)
+        if settings is not None:
+            self.hits["guild_settings"] += 1
+            return settings
+        self.misses["guild_settings"] += 1
+        data = await self.data.guild(guild).all()
+        settings = MappingProxyType({x: data[x] for x in self.guild_settings_keys})
+        self.guild_settings[guild.id] = settings
+        return settings
+
+    def invalidate_guild_settings(self, guild: discord.Guild):
+        self.guild_settings.pop(guild.id, None)
+        # resolved from the channels settings
+        self.invalidate_modlog_channels(guild)
+
+    def get_modlog_channel(self, guild: discord.Guild, level: int) -> Union[int, None, bool]:
+        """
+        Return the cached modlog channel ID for a warning level, :py:obj:`None` if there is no
+        modlog channel, or :py:obj:`False` if it wasn't resolved yet.
+        """
+        try:
+            channel_id = self.modlog_channels[guild.id][level]
+        except KeyError:
+            self.misses["modlog_channels"] += 1
+            return False
+        self.hits["modlog_channels"] += 1
+        return channel_id
+
+    def set_modlog_channel(self, guild: discord.Guild, level: int, channel_id: Optional[int]):
+        try:
+            self.modlog_channels[guild.id][level] = channel_id
+        except KeyError:
+            self.modlog_channels[guild.id] = {level: channel_id}
+
+    def invalidate_modlog_channels(self, guild: discord.Guild, channel_id: Optional[int] = None):
+        """
+        Forget the modlog channels of a guild, or only the levels resolved to channel_id.
+        """
+        if channel_id is None:
+            self.modlog_channels.pop(guild.id, None)
+            return
+        channels = self.modlog_channels.get(guild.id, {})
+        for level in [x for x, y in channels.items() if y == channel_id]:
+            del channels[level]
+
+    def get_automod_immunity(self, guild: discord.Guild, member: discord.Member) -> Optional[bool]:
+        """
+        Return the cached automod immunity of a member (immune or moderator), or :py:obj:`None`
+        if unknown or expired.
+        """
+        try:
+            immune, expiration = self.automod_immunity[guild.id][member.id]
+        except KeyError:
+            self.misses["automod_immunity"] += 1
+            return None
+        if expiration < time.monotonic():
+            self.misses["automod_immunity"] += 1
+            del self.automod_immunity[guild.id][member.id]
+            return None
+        self.hits["automod_immunity"] += 1
+        return immune
+
+    def prune_automod_immunity(self) -> int:
+        """
+        Remove the expired automod immunities and return how many were removed.
+        """
+        now = time.monotonic()
+        removed = 0
+        for guild_id, members in list(self.automod_immunity.items()):
+            expired = [x for x, (immune, expiration) in members.items() if expiration < now]
+            for member_id in expired:
+                del members[member_id]
+            removed += len(expired)
+            if not members:
+                del self.automod_immunity[guild_id]
+        return removed
+
+    def set_automod_immunity(self, guild: discord.Guild, member: discord.Member, immune: bool):
+        expiration = time.monotonic() + self.automod_immunity_ttl
+        try:
+            self.automod_immunity[guild.id][member.id] = (immune, expiration)
+        except KeyError:
+            self.automod_immunity[guild.id] = {member.id: (immune, expiration)}
+
+    def invalidate_automod_immunity(
+        self, guild: discord.Guild, member: Optional[discord.Member] = None
+    ):
+        """
+        Forget the automod immunity of a member, or of the whole guild if member is omitted.
+        """
+        if member is None:
+            self.automod_immunity.pop(guild.id, None)
+            return
+        try:
+            del self.automod_immunity[guild.id][member.id]
+        except KeyError:
+            pass
+
     async def get_mute_role(self, guild: discord.Guild):
         role_id = self.mute_roles.get(guild.id, False)
         if role_id is not False:
@@ -72,24 +245,82 @@ class MemoryCache:
         await self.data.guild(guild).mute_role.set(role.id)
         self.mute_roles[guild.id] = role.id
 
+    async def init_temp_actions(self):
+        """
+        Load the temp actions of all guilds and schedule their end.
+        """
+        for guild_id, data in (await self.data.all_guilds()).items():
+            temp_actions = data.get("temporary_warns") or {}
+            temp_actions = {int(x): y for x, y in temp_actions.items()}
+            self.temp_actions[guild_id] = temp_actions
+            for member_id, action in temp_actions.items():
+                self._schedule_temp_action(guild_id, member_id, action)
+
+    @staticmethod
+    def _get_temp_action_end(data: dict) -> int:
+        try:
+            return int(data["time"]) + int(data["duration"])
+        except (KeyError, TypeError, ValueError):
+            return 0  # broken data, removed as soon as possible
+
+    def _schedule_temp_action(self, guild_id: int, member_id: int, data: dict):
+        end = self._get_temp_action_end(data)
+        if not self.temp_actions_heap or end < self.temp_actions_heap[0][0]:
+            self.temp_actions_updated.set()  # the loop must wake up earlier
+        heapq.heappush(self.temp_actions_heap, (end, guild_id, member_id))
+
+    def retry_temp_action(self, guild_id: int, member_id: int, when: int):
+        """
+        Schedule again a temp action that couldn't be ended, at ``when`` (seconds since epoch).
+        """
+        if not self.temp_actions_heap or when < self.temp_actions_heap[0][0]:
+            self.temp_actions_updated.set()
+        heapq.heappush(self.temp_actions_heap, (when, guild_id, member_id))
+
+    def next_temp_action_end(self) -> Optional[int]:
+        """
+        Return the end time of the next temp action (seconds since epoch), if any.
+        """
+        return self.temp_actions_heap[0][0] if self.temp_actions_heap else None
+
+    def pop_ended_temp_actions(self, now: float) -> dict:
+        """
+        Unschedule the temp actions ending before ``now`` and return them, grouped by guild.
+
+        They're still in the cache and in Config, remove them once the action is cancelled.
+        """
+        ended = {}
+        heap = self.temp_actions_heap
+        while heap and heap[0][0] <= now:
+            end, guild_id, member_id = heapq.heappop(heap)
+            action = self.temp_actions.get(guild_id, {}).get(member_id)
+            # an entry ending after the action is a retry (see retry_temp_action)
+            if action is None or end < self._get_temp_action_end(action):
+                continue  # removed or replaced
+            ended.setdefault(guild_id, {})[member_id] = action
+        return ended
+
     async def get_temp_action(self, guild: discord.Guild, member: Optional[discord.Member] = None):
-        guild_temp_actions = self.temp_actions.get(guild.id, {})
-        if not guild_temp_actions:
+        guild_temp_actions = self.temp_actions.get(guild.id)
+        if guild_temp_actions is None:
+            self.misses["temp_actions"] += 1
             guild_temp_actions = await self.data.guild(guild).temporary_warns.all()
-            if guild_temp_actions:
-                self.temp_actions[guild.id] = guild_temp_actions
+            # Config saves keys as strings
+            guild_temp_actions = {int(x): y for x, y in guild_temp_actions.items()}
+            # also cached if empty, most guilds don't have any
+            guild_temp_actions = self.temp_actions.setdefault(guild.id, guild_temp_actions)
+        else:
+            self.hits["temp_actions"] += 1
         if member is None:
             return guild_temp_actions
         return guild_temp_actions.get(member.id)
 
     async def add_temp_action(self, guild: discord.Guild, member: discord.Member, data: dict):
         await self.data.guild(guild).temporary_warns.set_raw(member.id, value=data)
-        try:
-            guild_temp_actions = self.temp_actions[guild.id]
-        except KeyError:
-            self.temp_actions[guild.id] = {member.id: data}
-        else:
-            guild_temp_actions[member.id] = data
+        # if not loaded yet, the whole dict is fetched, a partial dict would be taken as complete
+        guild_temp_actions = await self.get_temp_action(guild)
+        guild_temp_actions[member.id] = data
+        self._schedule_temp_action(guild.id, member.id, data)
 
     async def remove_temp_action(self, guild: discord.Guild, member: discord.Member):
         await self.data.guild(guild).temporary_warns.clear_raw(member.id)
@@ -103,6 +334,233 @@ class MemoryCache:
         await self.data.guild(guild).temporary_warns.set(warns)
         self.temp_actions[guild.id] = warns
 
+    def _find_case(self, guild_id: int, member_id: int, case: dict) -> Optional[int]:
+        # binary search on the timestamp, then look for the exact case among the ones sharing it
+        cases = self.modlogs[guild_id]
+        time = case["time"] or 0
+        i = bisect.bisect_left(cases, (time,))
+        while i < len(cases) and cases[i][0] == time:
+            if cases[i][2] == member_id and cases[i][3] == case:
+                return i
+            i += 1
+        return None
+
+    async def get_guild_cases(self, guild: discord.Guild) -> list:
+        """
+        Return the index of all cases of a guild, sorted from the oldest to the newest.
+
+        Each item is a tuple ``(time, sequence, member_id, case)``. The index is built from
+        Config on first access, then kept updated by the methods below. Don't modify it.
+        """
+        cases = self.modlogs.get(guild.id)
+        if cases is not None:
+            return cases
+        async with self._modlogs_locks[guild.id]:
+            if guild.id in self.modlogs:
+                return self.modlogs[guild.id]
+            modlogs = await self.data.custom("MODLOGS", guild.id).all()
+            cases = []
+            for member_id, content in modlogs.items():
+                if member_id == "x":
+                    continue
+                cases.extend((x["time"] or 0, int(member_id), x) for x in content.get("x", []))
+            cases.sort(key=lambda x: x[0])  # stable sort, keeps the order of each member's cases
+            cases = [(time, next(self._modlogs_seq), member_id, x) for time, member_id, x in cases]
+            self.modlogs[guild.id] = cases
+        return cases
+
+    async def add_case(self, guild: discord.Guild, member: discord.abc.Snowflake, case: dict):
+        async with self._modlogs_locks[guild.id]:
+            async with self.data.custom("MODLOGS", guild.id, member.id).all() as modlog:
+                self._append_case(modlog, case)
+            self._index_case(guild.id, member.id, case)
+
+    async def add_cases(self, guild: discord.Guild, cases: list):
+        """
+        Add multiple cases at once, with a single Config transaction per member.
+
+        ``cases`` is a list of tuples ``(member_id, case)``.
+        """
+        if not cases:
+            return
+        members = defaultdict(list)
+        for member_id, case in cases:
+            members[member_id].append(case)
+        async with self._modlogs_locks[guild.id]:
+            # only the modlogs of these members are read and written, not the whole guild's
+            for member_id, member_cases in members.items():
+                async with self.data.custom("MODLOGS", guild.id, member_id).all() as modlog:
+                    for case in member_cases:
+                        self._append_case(modlog, case)
+                for case in member_cases:
+                    self._index_case(guild.id, member_id, case)
+
+    def _append_case(self, modlog: dict, case: dict):
+        modlog["x"].append(case)
+        if modlog["counts"] is None:
+            modlog["counts"] = self._count_cases(modlog["x"])
+        else:
+            level = str(case["level"])
+            modlog["counts"][level] = modlog["counts"].get(level, 0) + 1
+
+    def _index_case(self, guild_id: int, member_id: int, case: dict):
+        windows = self.autowarn_windows.get(guild_id, {}).get(member_id)
+        if windows is not None:
+            time = case["time"] or 0
+            for window in windows:
+                if window and window[-1] > time:
+                    bisect.insort(window, time)
+                else:
+                    window.append(time)
+        cases = self.modlogs.get(guild_id)
+        if cases is not None:
+            case = dict(case)
+            bisect.insort(cases, (case["time"] or 0, next(self._modlogs_seq), member_id, case))
+
+    def _invalidate_autowarn_windows(self, guild_id: int, member_id: int):
+        with contextlib.suppress(KeyError):
+            del self.autowarn_windows[guild_id][member_id]
+
+    async def edit_case(
+        self, guild: discord.Guild, member: discord.abc.Snowflake, index: int, case: dict
+    ):
+        """
+        Replace the case of a member at the given index (starting from 0).
+        """
+        async with self._modlogs_locks[guild.id]:
+            async with self.data.custom("MODLOGS", guild.id, member.id).x() as logs:
+                old_case = logs[index]
+                logs[index] = case
+            self._invalidate_autowarn_windows(guild.id, member.id)
+            if guild.id not in self.modlogs:
+                return
+            i = self._find_case(guild.id, member.id, old_case)
+            if i is None:
+                del self.modlogs[guild.id]  # out of sync, rebuild on next access
+                return
+            cases = self.modlogs[guild.id]
+            case = dict(case)
+            if (case["time"] or 0) == cases[i][0]:
+                cases[i] = (cases[i][0], cases[i][1], member.id, case)
+            else:
+                del cases[i]
+                bisect.insort(cases, (case["time"] or 0, next(self._modlogs_seq), member.id, case))
+
+    async def remove_case(
+        self, guild: discord.Guild, member: discord.abc.Snowflake, index: int
+    ) -> dict:
+        """
+        Remove the case of a member at the given index (starting from 0) and return it.
+        """
+        async with self._modlogs_locks[guild.id]:
+            async with self.data.custom("MODLOGS", guild.id, member.id).all() as modlog:
+                case = modlog["x"].pop(index)
+                if modlog["counts"] is not None:
+                    level = str(case["level"])
+                    modlog["counts"][level] = max(0, modlog["counts"].get(level, 0) - 1)
+            self._invalidate_autowarn_windows(guild.id, member.id)
+            if guild.id in self.modlogs:
+                i = self._find_case(guild.id, member.id, case)
+                if i is None:
+                    del self.modlogs[guild.id]
+                else:
+                    del self.modlogs[guild.id][i]
+        return case
+
+    async def clear_cases(self, guild: discord.Guild, member: discord.abc.Snowflake):
+        async with self._modlogs_locks[guild.id]:
+            await self.data.custom("MODLOGS", guild.id, member.id).clear()
+            self._invalidate_autowarn_windows(guild.id, member.id)
+            cases = self.modlogs.get(guild.id)
+            if cases is not None:
+                self.modlogs[guild.id] = [x for x in cases if x[2] != member.id]
+
+    @staticmethod
+    def _count_cases(cases: list) -> dict:
+        counts = {str(x): 0 for x in range(1, 6)}
+        for case in cases:
+            level = str(case["level"])
+            counts[level] = counts.get(level, 0) + 1
+        return counts
+
+    async def get_case_counts(self, guild: discord.Guild, member: discord.abc.Snowflake) -> dict:
+        """
+        Return the number of cases of a member for each level, as a dict of ``str(level): count``.
+
+        The counts are saved with the modlog of the member, and computed once from the modlog if
+        they're missing (cases set before this was added, or converted cases).
+        """
+        group = self.data.custom("MODLOGS", guild.id, member.id)
+        counts = await group.counts()
+        if counts is not None:
+            return counts
+        async with self._modlogs_locks[guild.id]:
+            counts = self._count_cases(await group.x())
+            if any(counts.values()):
+                # don't create an entry for members without any case
+                await group.counts.set(counts)
+        return counts
+
+    def modlogs_lock(self, guild: Union[discord.Guild, int]) -> asyncio.Lock:
+        """
+        Return the lock held while the modlogs of a guild are written. Take it before editing
+        the MODLOGS of a guild directly.
+        """
+        return self._modlogs_locks[getattr(guild, "id", guild)]
+
+    def invalidate_guild_cases(self, guild: Optional[Union[discord.Guild, int]] = None):
+        """
+        Drop the case index of a guild (or all guilds) after its modlogs were edited directly.
+        """
+        if guild is None:
+            self.modlogs.clear()
+            self.autowarn_windows.clear()
+            return
+        guild_id = getattr(guild, "id", guild)
+        self.modlogs.pop(guild_id, None)
+        self.autowarn_windows.pop(guild_id, None)
+
+    async def get_automod_warnings(self, guild: discord.Guild) -> list:
+        automod_warnings = self.automod_warnings.get(guild.id)
+        if automod_warnings is None:
+            automod_warnings = await self.data.guild(guild).automod.warnings()
+            self.automod_warnings[guild.id] = automod_warnings
+        return automod_warnings
+
+    async def update_automod_warnings(self, guild: discord.Guild):
+        """
+        Reload the autowarns of a guild after an edit. Counters are rebuilt on next access.
+        """
+        self.automod_warnings[guild.id] = await self.data.guild(guild).automod.warnings()
+        self.autowarn_windows.pop(guild.id, None)
+
+    async def get_autowarn_counts(
+        self, guild: discord.Guild, member: discord.abc.Snowflake
+    ) -> list:
+        """
+        Return, for each autowarn of the guild, the number of cases of the member within the
+        autowarn's time (all cases if there's no time).
+
+        The times of the cases are loaded from the modlog on first access for a member, then
+        new cases are added to the counters and old ones expire when this is called.
+        """
+        autowarns = await self.get_automod_warnings(guild)
+        guild_windows = self.autowarn_windows.setdefault(guild.id, {})
+        windows = guild_windows.get(member.id)
+        if windows is None or len(windows) != len(autowarns):
+            async with self._modlogs_locks[guild.id]:
+                logs = await self.data.custom("MODLOGS", guild.id, member.id).x()
+            times = sorted(x["time"] or 0 for x in logs)
+            windows = guild_windows[member.id] = [deque(times) for x in autowarns]
+        now = datetime.utcnow().timestamp()
+        for window, autowarn in zip(windows, autowarns):
+            if not autowarn["time"]:
+                continue
+            until = now - autowarn["time"]
+            while window and window[0] <= until:
+                window.popleft()
+        return [len(x) for x in windows]
+
     def is_automod_enabled(self, guild: discord.Guild):
         return guild.id in self.automod_enabled
 
@@ -118,31 +576,84 @@ class MemoryCache:
         automod_antispam = self.automod_antispam.get(guild.id, None)
         if automod_antispam is not None:
             return automod_antispam
-        automod_antispam = await self.data.guild(guild).automod.antispam.all()
-        if automod_antispam["enabled"] is False:
-            self.automod_antispam[guild.id] = False
-        else:
-            self.automod_antispam[guild.id] = automod_antispam
-        return automod_antispam
+        return await self.update_automod_antispam(guild)
 
     async def update_automod_antispam(self, guild: discord.Guild):
         data = await self.data.guild(guild).automod.antispam.all()
         if data["enabled"] is False:
             # if the antispam is disabled, no need to store the entire dict, too heavy
             self.automod_antispam[guild.id] = False
-        else:
-            self.automod_antispam[guild.id] = data
+            return False
+        # all words are searched at once in the message, compiled once here
+        words = data["whitelist"]
+        data["whitelist_pattern"] = (
+            re.compile("|".join(re.escape(x) for x in words)) if words else None
+        )
+        self.automod_antispam[guild.id] = data
+        return data
 
     async def get_automod_regex(self, guild: discord.Guild):
-        automod_regex = self.automod_regex.get(guild.id, {})
-        if automod_regex:
+        automod_regex = self.automod_regex.get(guild.id)
+        if automod_regex is not None:
+            self.hits["automod_regex"] += 1
             return automod_regex
+        self.misses["automod_regex"] += 1
         automod_regex = await self.data.guild(guild).automod.regex()
         for name, regex in automod_regex.items():
             pattern = re.compile(regex["regex"])
             automod_regex[name]["regex"] = pattern
-        self.automod_regex[guild.id] = automod_regex
-        return automod_regex
+        # also cached if empty, this is called for every message
+        return self.automod_regex.setdefault(guild.id, automod_regex)
+
+    async def get_automod_regex_matcher(self, guild: discord.Guild) -> tuple:
+        """
+        Return the version of the matcher, a tuple of the names and a tuple of the patterns of
+        the guild's regex triggers.
+
+        This is what's given to the regex pool to search all triggers at once. It is built on
+        first access and rebuilt with a new version after a regex is added or removed.
+        """
+        matcher = self.automod_regex_matchers.get(guild.id)
+        if matcher is None:
+            automod_regex = await self.get_automod_regex(guild)
+            matcher = (
+                next(self._automod_regex_versions),
+                tuple(automod_regex),
+                tuple(x["regex"] for x in automod_regex.values()),
+            )
+            self.automod_regex_matchers[guild.id] = matcher
+        return matcher
+
+    @staticmethod
+    def get_automod_regex_result_key(guild: discord.Guild, version: int, content: str) -> tuple:
+        digest = hashlib.blake2b(content.encode(), digest_size=16).digest()
+        return (guild.id, version, digest)
+
+    def get_automod_regex_result(self, key: tuple) -> Optional[tuple]:
+        """
+        Return the matched triggers (a bool for each pattern of the matcher) of a message
+        content already searched, or `None`.
+
+        The results of a guild are removed when its regex triggers change.
+        """
+        try:
+            result = self.automod_regex_results[key]
+        except KeyError:
+            self.misses["regex_results"] += 1
+            return None
+        self.hits["regex_results"] += 1
+        self.automod_regex_results.move_to_end(key)
+        return result
+
+    def set_automod_regex_result(self, key: tuple, result: tuple):
+        self.automod_regex_results[key] = result
+        if len(self.automod_regex_results) > self.automod_regex_results_size:
+            self.automod_regex_results.popitem(last=False)
+
+    def _invalidate_automod_regex(self, guild: discord.Guild):
+        self.automod_regex_matchers.pop(guild.id, None)
+        for key in [x for x in self.automod_regex_results if x[0] == guild.id]:
+            del self.automod_regex_results[key]
 
     async def add_automod_regex(
         self,
@@ -156,10 +667,10 @@ class MemoryCache:
         data = {"regex": regex.pattern, "level": level, "time": time, "reason": reason}
         await self.data.guild(guild).automod.regex.set_raw(name, value=data)
         data["regex"] = regex
-        if guild.id not in self.automod_regex:
-            self.automod_regex[guild.id] = {name: data}
-        else:
-            self.automod_regex[guild.id][name] = data
+        # if not loaded yet, the whole dict is fetched, a partial dict would be taken as complete
+        automod_regex = await self.get_automod_regex(guild)
+        automod_regex[name] = data
+        self._invalidate_automod_regex(guild)
 
     async def remove_automod_regex(self, guild: discord.Guild, name: str):
         await self.data.guild(guild).automod.regex.clear_raw(name)
@@ -167,6 +678,7 @@ class MemoryCache:
             del self.automod_regex[guild.id][name]
         except KeyError:
             pass
+        self._invalidate_automod_regex(guild)
 
     async def set_automod_regex_edited(self, guild: discord.Guild, enable: bool):
         await self.data.guild(guild).automod.regex_edited_messages.set(enable)
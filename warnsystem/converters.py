@@ -41,6 +41,7 @@ class AdvancedMemberSelect:
     --take-action --take-actions
     --send-dm
     --send-modlog
+    --modlog-summary
     --confirm
     --reason <text>
     --time --length <duration>
@@ -99,6 +100,7 @@ class AdvancedMemberSelect:
         )
         parser.add_argument("--send-dm", dest="send_dm", action="store_true")
         parser.add_argument("--send-modlog", dest="send_modlog", action="store_true")
+        parser.add_argument("--modlog-summary", dest="modlog_summary", action="store_true")
         parser.add_argument("--confirm", dest="confirm", action="store_true")
         parser.add_argument("--reason", dest="reason", nargs="*")
         parser.add_argument("--length", "--time", dest="time", nargs="*")
@@ -146,7 +148,12 @@ class AdvancedMemberSelect:
         members: List[discord.Member] = []
         unavailable_members: List[UnavailableMember] = []
 
-        if not args.take_action and not args.send_dm and not args.send_modlog:
+        if (
+            not args.take_action
+            and not args.send_dm
+            and not args.send_modlog
+            and not args.modlog_summary
+        ):
             raise BadArgument(
                 _(
                     "I'm not doing anything! Please provide at least one of these "
@@ -451,7 +458,8 @@ class AdvancedMemberSelect:
                 self.time = None
             self.take_action = args.take_action
             self.send_dm = args.send_dm
-            self.send_modlog = args.send_modlog
+            self.send_modlog = args.send_modlog or args.modlog_summary
+            self.modlog_summary = args.modlog_summary
             self.confirm = args.confirm
             self.members, self.unavailable_members = await self.process_arguments(args)
             return self
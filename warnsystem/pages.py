@@ -0,0 +1,255 @@
+import asyncio
+import contextlib
+import discord
+import logging
+
+from abc import ABC, abstractmethod
+from typing import Union, TYPE_CHECKING
+
+from redbot.core import commands
+from redbot.core.i18n import Translator
+from redbot.core.utils.menus import start_adding_reactions
+from redbot.core.utils.predicates import ReactionPredicate
+
+if TYPE_CHECKING:
+    from .api import API
+
+log = logging.getLogger("red.laggron.warnsystem")
+_ = Translator("WarnSystem", __file__)
+
+
+class PageSource(ABC):
+    """
+    The pages of a menu, only rendered when they are displayed.
+
+    This replaces the list of pages given to Red's menu, which requires all pages to be
+    generated before showing the first one.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_page(self, page: int) -> Union[str, discord.Embed]:
+        pass
+
+
+class WarnlistSource(PageSource):
+    """
+    Pages of the `[p]warnlist` command, from the newest case to the oldest.
+    """
+
+    per_page = 5
+    max_length = 1900
+
+    def __init__(self, api: "API", guild: discord.Guild, total: int):
+        self.api = api
+        self.guild = guild
+        self.total = total
+
+    def __len__(self):
+        return max(1, -(-self.total // self.per_page))
+
+    def _format_case(self, number: int, case: dict, reason: str) -> str:
+        text = _(
+            "--- Case {number} ---\n"
+            "Member:    {member} (ID: {member.id})\n"
+            "Level:     {level}\n"
+            "Reason:    {reason}\n"
+            "Author:    {author} (ID: {author.id})\n"
+            "Date:      {time}\n"
+        ).format(number=number, **dict(case, reason=reason))
+        if case["duration"]:
+            duration = self.api._get_timedelta(case["duration"])
+            text += _("Duration:  {duration}\nUntil:     {until}\n").format(
+                duration=self.api._format_timedelta(duration),
+                until=self.api._format_datetime(case["time"] + duration),
+            )
+        return text + "\n\n"
+
+    async def get_page(self, page: int) -> str:
+        # cases may have been added or deleted since the menu was opened
+        self.total = len(await self.api.cache.get_guild_cases(self.guild))
+        page = min(page, len(self) - 1)
+        skip = page * self.per_page
+        cases = [x async for x in self.api.iter_cases(self.guild, skip=skip, limit=self.per_page)]
+        numbers = range(self.total - skip, self.total - skip - len(cases), -1)
+        texts = [self._format_case(i, x, x["reason"]) for i, x in zip(numbers, cases)]
+        if sum(len(x) for x in texts) > self.max_length:
+            # long reasons, share the remaining space between them
+            overhead = sum(len(x) - len(str(y["reason"])) for x, y in zip(texts, cases))
+            size = max(20, (self.max_length - overhead) // len(cases))
+            texts = [
+                self._format_case(i, x, self._shorten(str(x["reason"]), size))
+                for i, x in zip(numbers, cases)
+            ]
+        return f"```yml\n{''.join(texts)}```\n" + _("{total} warnings. Page {i}/{pages}").format(
+            total=self.total, i=page + 1, pages=len(self)
+        )
+
+    @staticmethod
+    def _shorten(text: str, size: int) -> str:
+        return text if len(text) <= size else text[: size - 3] + "..."
+
+
+class WarningsSource(PageSource):
+    """
+    Pages of the `[p]warnings` command: the member's summary, then one page per case.
+    """
+
+    def __init__(
+        self,
+        api: "API",
+        guild: discord.Guild,
+        user: discord.abc.User,
+        cases: list,
+        colors: dict,
+        summary: discord.Embed,
+    ):
+        self.api = api
+        self.guild = guild
+        self.user = user
+        self.cases = cases
+        self.colors = colors  # fetched once for the whole menu
+        self.summary = summary
+
+    def __len__(self):
+        return len(self.cases) + 1
+
+    @staticmethod
+    def warning_str(level: int, plural: bool) -> str:
+        return {
+            1: (_("Warning"), _("Warnings")),
+            2: (_("Mute"), _("Mutes")),
+            3: (_("Kick"), _("Kicks")),
+            4: (_("Softban"), _("Softbans")),
+            5: (_("Ban"), _("Bans")),
+        }.get(level, _("unknown"))[1 if plural else 0]
+
+    async def get_page(self, page: int) -> discord.Embed:
+        if page == 0:
+            return self.summary
+        case = self.cases[page - 1]
+        level = case["level"]
+        moderator = self.guild.get_member(case["author"])
+        moderator = "ID: " + str(case["author"]) if not moderator else moderator.mention
+
+        time = self.api._get_datetime(case["time"])
+        embed = discord.Embed(description=_("Case #{number} informations").format(number=page))
+        embed.set_author(name=f"{self.user} | {self.user.id}", icon_url=self.user.avatar_url)
+        embed.add_field(
+            name=_("Level"), value=f"{self.warning_str(level, False)} ({level})", inline=True
+        )
+        embed.add_field(name=_("Moderator"), value=moderator, inline=True)
+        if case["duration"]:
+            duration = self.api._get_timedelta(case["duration"])
+            embed.add_field(
+                name=_("Duration"),
+                value=_("{duration}\n(Until {date})").format(
+                    duration=self.api._format_timedelta(duration),
+                    date=self.api._format_datetime(time + duration),
+                ),
+            )
+        embed.add_field(name=_("Reason"), value=case["reason"], inline=False)
+        embed.timestamp = time
+        embed.colour = self.colors[str(level)]
+        return embed
+
+
+async def menu(
+    ctx: commands.Context,
+    pages: PageSource,
+    controls: dict,
+    message: discord.Message = None,
+    page: int = 0,
+    timeout: float = 30.0,
+):
+    """
+    Same as Red's menu (``redbot.core.utils.menus.menu``), but takes a :class:`PageSource`.
+
+    Controls are called with the same arguments, they receive the source instead of a list.
+    """
+    current_page = await pages.get_page(page)
+    if not message:
+        if isinstance(current_page, discord.Embed):
+            message = await ctx.send(embed=current_page)
+        else:
+            message = await ctx.send(current_page)
+        # Don't wait for reactions to be added (GH-1797)
+        start_adding_reactions(message, controls.keys())
+    else:
+        try:
+            if isinstance(current_page, discord.Embed):
+                await message.edit(embed=current_page)
+            else:
+                await message.edit(content=current_page)
+        except discord.errors.NotFound:
+            return
+    try:
+        react, user = await ctx.bot.wait_for(
+            "reaction_add",
+            check=ReactionPredicate.with_emojis(tuple(controls.keys()), message, ctx.author),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        try:
+            if message.channel.permissions_for(ctx.me).manage_messages:
+                await message.clear_reactions()
+            else:
+                for key in controls.keys():
+                    await message.remove_reaction(key, ctx.bot.user)
+        except discord.errors.HTTPException:
+            pass
+        return
+    return await controls[react.emoji](ctx, pages, controls, message, page, timeout, react.emoji)
+
+
+async def _remove_reaction(ctx: commands.Context, message: discord.Message, emoji: str):
+    if message.channel.permissions_for(ctx.me).manage_messages:
+        with contextlib.suppress(discord.errors.NotFound):
+            await message.remove_reaction(emoji, ctx.author)
+
+
+async def next_page(
+    ctx: commands.Context,
+    pages: PageSource,
+    controls: dict,
+    message: discord.Message,
+    page: int,
+    timeout: float,
+    emoji: str,
+):
+    await _remove_reaction(ctx, message, emoji)
+    page = 0 if page >= len(pages) - 1 else page + 1
+    return await menu(ctx, pages, controls, message=message, page=page, timeout=timeout)
+
+
+async def prev_page(
+    ctx: commands.Context,
+    pages: PageSource,
+    controls: dict,
+    message: discord.Message,
+    page: int,
+    timeout: float,
+    emoji: str,
+):
+    await _remove_reaction(ctx, message, emoji)
+    page = len(pages) - 1 if page <= 0 else page - 1
+    return await menu(ctx, pages, controls, message=message, page=page, timeout=timeout)
+
+
+async def close_menu(
+    ctx: commands.Context,
+    pages: PageSource,
+    controls: dict,
+    message: discord.Message,
+    page: int,
+    timeout: float,
+    emoji: str,
+):
+    with contextlib.suppress(discord.errors.NotFound):
+        await message.delete()
+
+
+DEFAULT_CONTROLS = {"⬅": prev_page, "❌": close_menu, "➡": next_page}
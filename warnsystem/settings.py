@@ -1,3 +1,4 @@
+import asyncio
 import discord
 import logging
 import time
@@ -37,6 +38,11 @@ class SettingsMixin(MixinMeta):
         """
         pass
 
+    async def cog_after_invoke(self, ctx: commands.Context):
+        # the settings used when warning are cached, they may have been edited
+        if ctx.guild and ctx.command.qualified_name.split()[0] == "warnset":
+            self.cache.invalidate_guild_settings(ctx.guild)
+
     # commands are listed in the alphabetic order, like the help message
     @warnset.command(name="autoupdate")
     async def warnset_autoupdate(self, ctx: commands.Context, enable: bool = None):
@@ -241,8 +247,12 @@ class SettingsMixin(MixinMeta):
                         }
                     )
                     total_cases += 1
-                async with self.data.custom("MODLOGS", guild.id, int(member)).x() as logs:
-                    logs.extend(cases)
+                async with self.cache.modlogs_lock(guild):
+                    async with self.data.custom("MODLOGS", guild.id, int(member)).x() as logs:
+                        logs.extend(cases)
+                    # counts will be computed again on next access
+                    await self.data.custom("MODLOGS", guild.id, int(member)).counts.clear()
+            self.cache.invalidate_guild_cases(guild)
             return total_cases
 
         guild = ctx.guild
@@ -321,7 +331,9 @@ class SettingsMixin(MixinMeta):
             total = await convert(content)
         elif pred.result == 1:
             await ctx.send(_("Deleting server logs... Settings, such as channels, are kept."))
-            await self.data.custom("MODLOGS").set({})
+            async with self.cache.modlogs_lock(guild):
+                await self.data.custom("MODLOGS", guild.id).clear()
+                self.cache.invalidate_guild_cases(guild)
             await ctx.send(_("Starting conversion... This might take a long time."))
             total = await convert(content)
         t2 = time.time()
@@ -476,6 +488,7 @@ save it, as if it was performed with WarnSystem. **However, the member will not
 
         You can specify a role when invoking the command to specify which role should be used.
         If you don't specify a role, one will be created for you.
+        If the setup of the channels was interrupted, run the command again to resume it.
         """
         guild = ctx.guild
         my_position = guild.me.top_role.position
@@ -485,34 +498,74 @@ save it, as if it was performed with WarnSystem. **However, the member will not
                     _("I can't manage roles, please give me this permission to continue.")
                 )
                 return
-            async with ctx.typing():
-                fails = await self.api.maybe_create_mute_role(guild)
-                my_position = guild.me.top_role.position
-                if fails is False:
-                    await ctx.send(
-                        _(
-                            "A mute role was already created! You can change it by specifying "
-                            "a role when typing the command.\n`[p]warnset mute <role name>`"
-                        )
-                    )
-                    return
-                else:
-                    if fails:
-                        errors = _(
-                            "\n\nSome errors occured when editing the channel permissions:\n"
-                        ) + "\n".join(fails)
+            # an interrupted setup of the current mute role is resumed
+            mute_role = guild.get_role(await self.cache.get_mute_role(guild))
+            checkpoint = await self.data.guild(guild).mute_setup()
+            resumed = bool(mute_role and checkpoint and checkpoint["role"] == mute_role.id)
+            i = 0
+            total = None
+            message = None
+
+            async def update_count(count, total_channels):
+                nonlocal i, total
+                i, total = count, total_channels
+
+            async def update_message():
+                nonlocal message
+                while True:
+                    await asyncio.sleep(5)
+                    if not total:
+                        continue
+                    content = _(
+                        "Editing the permissions of the mute role... {i}/{total} channels done."
+                    ).format(i=i, total=total)
+                    if message:
+                        await message.edit(content=content)
                     else:
-                        errors = ""
-                    text = (
-                        _(
-                            "The role `Muted` was successfully created at position {pos}. Feel "
-                            "free to drag it in the hierarchy and edit its permissions, as long "
-                            "as my top role is above and the members to mute are below."
-                        ).format(pos=my_position - 1)
-                        + errors
+                        message = await ctx.send(content)
+
+            task = self.bot.loop.create_task(update_message())
+            try:
+                async with ctx.typing():
+                    fails = await self.api.maybe_create_mute_role(
+                        guild, progress_tracker=update_count
                     )
-                    for page in pagify(text):
-                        await ctx.send(page)
+            finally:
+                task.cancel()
+            my_position = guild.me.top_role.position
+            if fails is False:
+                await ctx.send(
+                    _(
+                        "A mute role was already created! You can change it by specifying "
+                        "a role when typing the command.\n`[p]warnset mute <role name>`"
+                    )
+                )
+                return
+            if fails:
+                errors = _(
+                    "\n\nSome errors occured when editing the channel permissions:\n"
+                ) + "\n".join(fails)
+            else:
+                errors = ""
+            if resumed:
+                text = (
+                    _(
+                        "The interrupted setup of the mute role `{role}` was resumed and "
+                        "completed."
+                    ).format(role=mute_role.name)
+                    + errors
+                )
+            else:
+                text = (
+                    _(
+                        "The role `Muted` was successfully created at position {pos}. Feel "
+                        "free to drag it in the hierarchy and edit its permissions, as long "
+                        "as my top role is above and the members to mute are below."
+                    ).format(pos=my_position - 1)
+                    + errors
+                )
+            for page in pagify(text):
+                await ctx.send(page)
         elif role.position >= my_position:
             await ctx.send(
                 _(
@@ -631,6 +684,39 @@ channels, and prevented from talking in all voice channels.
         for page in pagify(text):
             await ctx.send(page)
 
+    @warnset.command(name="regexprocesses")
+    @checks.is_owner()
+    async def warnset_regexprocesses(self, ctx: commands.Context, processes: int = None):
+        """
+        Set the number of processes searching the automod regex triggers.
+
+        This setting is shared by all servers. Regex patterns are searched in separate\
+processes so a malicious pattern can't block the bot. More processes can check more\
+messages at once, but use more memory.
+
+        Invoke the command without arguments to get the current value.
+        """
+        current = await self.data.regex_pool_processes()
+        if processes is None:
+            await ctx.send(
+                _(
+                    "{processes} processes are used to search the regex triggers. If you want "
+                    "to change this, type `[p]warnset regexprocesses <number>`."
+                ).format(processes=current)
+            )
+        elif not 1 <= processes <= 16:
+            await ctx.send(_("The number of processes must be between 1 and 16."))
+        else:
+            await self.data.regex_pool_processes.set(processes)
+            self.api.re_pool.processes = processes
+            # started again with the new size on the next search
+            self.api.re_pool.close()
+            await ctx.send(
+                _("Done. {processes} processes will be used to search the regex triggers.").format(
+                    processes=processes
+                )
+            )
+
     @warnset.command(name="reinvite")
     async def warnset_reinvite(self, ctx: commands.Context, enable: bool = None):
         """
@@ -5,7 +5,7 @@ import asyncio
 import re
 
 from io import BytesIO
-from typing import Optional
+from typing import Optional, Union
 from asyncio import TimeoutError as AsyncTimeoutError
 from abc import ABC
 from datetime import datetime, timedelta
@@ -15,13 +15,15 @@ from redbot.core import commands, Config, checks
 from redbot.core.commands.converter import TimedeltaConverter
 from redbot.core.i18n import Translator, cog_i18n
 from redbot.core.utils import predicates, menus, mod
-from redbot.core.utils.chat_formatting import pagify
+from redbot.core.utils.chat_formatting import box, pagify
 
 from . import errors
+from . import pages as lazy_menus
 from .api import API, UnavailableMember
 from .automod import AutomodMixin
 from .cache import MemoryCache
 from .converters import AdvancedMemberSelect
+from .pages import PageSource, WarningsSource, WarnlistSource
 from .settings import SettingsMixin
 
 log = logging.getLogger("red.laggron.warnsystem")
@@ -112,6 +114,22 @@ EMBED_MODLOG = lambda x: _("A member got a level {} warning.").format(x)
 EMBED_USER = lambda x: _("The moderation team set you a level {} warning.").format(x)
 
 
+class PendingManualAction:
+    """
+    A kick or a ban made without WarnSystem, waiting for its audit log entry.
+    """
+
+    __slots__ = ("member", "level", "when", "attempts", "next_check")
+
+    def __init__(self, member: Union[discord.Member, discord.User], level: int):
+        self.member = member
+        self.level = level
+        self.when = datetime.utcnow()
+        self.attempts = 0
+        # prevent small delays from causing a 5 minute delay on entry
+        self.next_check = self.when + timedelta(seconds=10)
+
+
 class CompositeMetaClass(type(commands.Cog), type(ABC)):
     """
     This allows the metaclass used for proper type detection to
@@ -134,13 +152,15 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
     """
 
     default_global = {
-        "data_version": "0.0"  # will be edited after config update, current version is 1.0
+        "data_version": "0.0",  # will be edited after config update, current version is 1.0
+        "regex_pool_processes": 2,  # processes searching the automod regex triggers
     }
     default_guild = {
         "delete_message": False,  # if the [p]warn commands should delete the context message
         "show_mod": False,  # if the responsible mod should be revealed to the warned user
         "mute_role": None,  # the role used for mute
         "update_mute": False,  # if the bot should update perms of each new text channel/category
+        "mute_setup": None,  # channels left to edit for the mute role, if the setup was interrupted
         "remove_roles": False,  # if the bot should remove all other roles on mute
         "respect_hierarchy": False,  # if the bot should check if the mod is allowed by hierarchy
         # TODO use bot settingfor respect_hierarchy ?
@@ -208,7 +228,10 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             "warnings": [],  # all automatic warns
         },
     }
-    default_custom_member = {"x": []}  # cannot set a list as base group
+    default_custom_member = {
+        "x": [],  # cannot set a list as base group
+        "counts": None,  # number of cases for each level, computed from x if None
+    }
 
     def __init__(self, bot):
         self.bot = bot
@@ -226,6 +249,10 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         self.api = API(self.bot, self.data, self.cache)
 
         self.task: asyncio.Task
+        # guild ID > (level, member ID) > PendingManualAction, see on_manual_action
+        self.manual_actions = {}
+        self.manual_action_events = {}  # guild ID > event set when an action is added
+        self.manual_action_tasks = {}  # guild ID > poller task
 
     __version__ = "1.4.0"
     __author__ = ["retke (El Laggron)"]
@@ -319,6 +346,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         reason=None,
         time=None,
         confirm=False,
+        modlog_summary=False,
     ):
         guild = ctx.guild
         message = None
@@ -456,6 +484,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 log_dm=log_dm,
                 take_action=take_action,
                 progress_tracker=update_count if not confirm else None,
+                modlog_summary=modlog_summary,
             )
         except errors.MissingPermissions as e:
             await ctx.send(e)
@@ -645,6 +674,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             None,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @masswarn.command(name="1", aliases=["simple"])
@@ -672,6 +702,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             None,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @masswarn.command(name="2", aliases=["mute"])
@@ -702,6 +733,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             selection.time,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @masswarn.command(name="3", aliases=["kick"])
@@ -729,6 +761,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             None,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @masswarn.command(name="4", aliases=["softban"])
@@ -756,6 +789,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             None,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @masswarn.command(name="5", aliases=["ban"])
@@ -786,6 +820,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             selection.reason,
             selection.time,
             selection.confirm,
+            modlog_summary=selection.modlog_summary,
         )
 
     @commands.command()
@@ -822,15 +857,8 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             return
 
         total = lambda level: len([x for x in cases if x["level"] == level])
-        warning_str = lambda level, plural: {
-            1: (_("Warning"), _("Warnings")),
-            2: (_("Mute"), _("Mutes")),
-            3: (_("Kick"), _("Kicks")),
-            4: (_("Softban"), _("Softbans")),
-            5: (_("Ban"), _("Bans")),
-        }.get(level, _("unknown"))[1 if plural else 0]
-
-        embeds = []
+        warning_str = WarningsSource.warning_str
+
         msg = []
         for i in range(6):
             total_warns = total(i)
@@ -865,48 +893,23 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         )
         embed.set_footer(text=_("Click on the reactions to scroll through the warnings"))
         embed.colour = user.top_role.colour
-        embeds.append(embed)
 
-        for i, case in enumerate(cases):
-            level = case["level"]
-            moderator = ctx.guild.get_member(case["author"])
-            moderator = "ID: " + str(case["author"]) if not moderator else moderator.mention
-
-            time = self.api._get_datetime(case["time"])
-            embed = discord.Embed(
-                description=_("Case #{number} informations").format(number=i + 1)
-            )
-            embed.set_author(name=f"{user} | {user.id}", icon_url=user.avatar_url)
-            embed.add_field(
-                name=_("Level"), value=f"{warning_str(level, False)} ({level})", inline=True
-            )
-            embed.add_field(name=_("Moderator"), value=moderator, inline=True)
-            if case["duration"]:
-                duration = self.api._get_timedelta(case["duration"])
-                embed.add_field(
-                    name=_("Duration"),
-                    value=_("{duration}\n(Until {date})").format(
-                        duration=self.api._format_timedelta(duration),
-                        date=self.api._format_datetime(time + duration),
-                    ),
-                )
-            embed.add_field(name=_("Reason"), value=case["reason"], inline=False),
-            embed.timestamp = time
-            embed.colour = await self.data.guild(ctx.guild).colors.get_raw(level)
-            embeds.append(embed)
+        # case embeds are only built when their page is displayed
+        colors = (await self.cache.get_guild_settings(ctx.guild))["colors"]
+        source = WarningsSource(self.api, ctx.guild, user, cases, colors, embed)
 
-        controls = {"⬅": menus.prev_page, "❌": menus.close_menu, "➡": menus.next_page}
+        controls = lazy_menus.DEFAULT_CONTROLS.copy()
         if await mod.is_mod_or_superior(self.bot, ctx.author):
             controls.update({"✏": self._edit_case, "🗑": self._delete_case})
 
-        await menus.menu(
-            ctx=ctx, pages=embeds, controls=controls, message=None, page=index, timeout=60
+        await lazy_menus.menu(
+            ctx=ctx, pages=source, controls=controls, message=None, page=index, timeout=60
         )
 
     async def _edit_case(
         self,
         ctx: commands.Context,
-        pages: list,
+        pages: PageSource,
         controls: dict,
         message: discord.Message,
         page: int,
@@ -971,7 +974,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         if page == 0:
             # first page, no case to edit
             await message.remove_reaction(emoji, ctx.author)
-            return await menus.menu(
+            return await lazy_menus.menu(
                 ctx, pages, controls, message=message, page=page, timeout=timeout
             )
         await message.clear_reactions()
@@ -1016,18 +1019,22 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             await message.edit(content=_("Question timed out."), embed=None)
             return
         if pred.result:
-            async with self.data.custom("MODLOGS", guild.id, member.id).x() as logs:
-                logs[page - 1]["reason"] = new_reason
-                try:
-                    channel_id, message_id = logs[page - 1]["modlog_message"].values()
-                except KeyError:
-                    result = None
-                else:
-                    result = await edit_message(channel_id, message_id, new_reason)
+            case["reason"] = new_reason
+            await self.cache.edit_case(guild, member, page - 1, case)
+            modlog_message = case.get("modlog_message") or {}
+            if "message_id" not in modlog_message or modlog_message.get("modlog_summary"):
+                # the summary of a mass warn is shared with other cases, it's left as is
+                result = None
+            else:
+                result = await edit_message(
+                    modlog_message["channel_id"], modlog_message["message_id"], new_reason
+                )
             await message.clear_reactions()
             text = _("The reason was successfully edited!\n")
             if result is False:
                 text += _("*The modlog message couldn't be edited. Check your logs for details.*")
+            elif modlog_message.get("modlog_summary"):
+                text += _("*The modlog message is the summary of a mass warn, it was not edited.*")
             await message.edit(content=text, embed=None)
         else:
             await message.clear_reactions()
@@ -1036,7 +1043,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
     async def _delete_case(
         self,
         ctx: commands.Context,
-        pages: list,
+        pages: PageSource,
         controls: dict,
         message: discord.Message,
         page: int,
@@ -1118,7 +1125,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 if member:
                     if mute_role and mute_role in member.roles:
                         can_unmute = True
-                    add_roles = await self.data.guild(guild).remove_roles()
+                    add_roles = (await self.cache.get_guild_settings(guild))["remove_roles"]
             description = _(
                 "Case #{number} deletion.\n**Click on the reaction to confirm your action.**"
             ).format(number=page)
@@ -1144,41 +1151,47 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             return
         if page == 0:
             # removing entire modlog
-            await self.data.custom("MODLOGS", guild.id, member.id).x.set([])
+            await self.cache.clear_cases(guild, member)
             log.debug(f"[Guild {guild.id}] Cleared modlog of member {member} (ID: {member.id}).")
             await message.clear_reactions()
             await message.edit(content=_("User modlog cleared."), embed=None)
             return
-        async with self.data.custom("MODLOGS", guild.id, member.id).x() as logs:
-            try:
-                roles = logs[page - 1]["roles"]
-            except KeyError:
-                roles = []
-            try:
-                channel_id, message_id = logs[page - 1]["modlog_message"].values()
-            except KeyError:
-                result = None
-            else:
-                result = await delete_message(channel_id, message_id)
-            logs.remove(logs[page - 1])
+        case = await self.cache.remove_case(guild, member, page - 1)
+        try:
+            roles = case["roles"]
+        except KeyError:
+            roles = []
+        modlog_message = case.get("modlog_message") or {}
+        if "message_id" not in modlog_message or modlog_message.get("modlog_summary"):
+            # the summary of a mass warn is shared with other cases, it's left as is
+            result = None
+        else:
+            result = await delete_message(
+                modlog_message["channel_id"], modlog_message["message_id"]
+            )
         log.debug(
             f"[Guild {guild.id}] Removed case #{page} from member {member} (ID: {member.id})."
         )
         await message.clear_reactions()
-        if can_unmute:
-            await member.remove_roles(
-                mute_role,
+        roles = list(filter(None, [guild.get_role(x) for x in roles])) if add_roles else []
+        if can_unmute or roles:
+            # unmute and add the roles back in one request
+            fails = await self.api._swap_roles(
+                member,
+                [mute_role] if can_unmute else [],
+                roles,
                 reason=_("Warning deleted by {author}").format(
                     author=f"{str(ctx.author)} (ID: {ctx.author.id})"
                 ),
             )
-        if roles:
-            roles = [guild.get_role(x) for x in roles]
-            await member.add_roles(*roles, reason=_("Adding removed roles back after unmute."))
-        text = _("The case was successfully deleted!")
+            if fails:
+                self.api._log_role_fails(member, fails, "edit (while deleting a mute)")
+        text = _("The case was successfully deleted!") + "\n"
         if result is False:
             text += _("*The modlog message couldn't be deleted. Check your logs for details.*")
-        await message.edit(content=_("The case was successfully deleted!"), embed=None)
+        elif modlog_message.get("modlog_summary"):
+            text += _("*The modlog message is the summary of a mass warn, it was not deleted.*")
+        await message.edit(content=text, embed=None)
 
     @commands.command()
     @checks.mod_or_permissions(kick_members=True)
@@ -1188,41 +1201,15 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         List the latest warnings issued on the server.
         """
         guild = ctx.guild
-        full_text = ""
-        warns = await self.api.get_all_cases(guild)
-        if not warns:
+        total = len(await self.cache.get_guild_cases(guild))
+        if not total:
             await ctx.send(_("No warnings have been issued in this server yet."))
             return
-        for i, warn in enumerate(warns, start=1):
-            text = _(
-                "--- Case {number} ---\n"
-                "Member:    {member} (ID: {member.id})\n"
-                "Level:     {level}\n"
-                "Reason:    {reason}\n"
-                "Author:    {author} (ID: {author.id})\n"
-                "Date:      {time}\n"
-            ).format(number=i, **warn)
-            if warn["duration"]:
-                duration = self.api._get_timedelta(warn["duration"])
-                text += _("Duration:  {duration}\nUntil:     {until}\n").format(
-                    duration=self.api._format_timedelta(duration),
-                    until=self.api._format_datetime(warn["time"] + duration),
-                )
-            text += "\n\n"
-            full_text = text + full_text
-        pages = [
-            x for x in pagify(full_text, delims=["\n\n", "\n"], priority=True, page_length=1900)
-        ]
-        total_pages = len(pages)
-        total_warns = len(warns)
-        pages = [
-            f"```yml\n{x}```\n"
-            + _("{total} warnings. Page {i}/{pages}").format(
-                total=total_warns, i=i, pages=total_pages
-            )
-            for i, x in enumerate(pages, start=1)
-        ]
-        await menus.menu(ctx=ctx, pages=pages, controls=menus.DEFAULT_CONTROLS, timeout=60)
+        # pages are rendered when displayed, from the newest to the oldest case
+        source = WarnlistSource(self.api, guild, total)
+        await lazy_menus.menu(
+            ctx=ctx, pages=source, controls=lazy_menus.DEFAULT_CONTROLS, timeout=60
+        )
 
     @commands.command()
     @checks.mod_or_permissions(manage_roles=True)
@@ -1256,36 +1243,30 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                     except KeyError:
                         continue
                     break
-        await member.remove_roles(
-            mute_role,
+        roles = list(filter(None, [guild.get_role(x) for x in roles]))
+        # the mute role is removed and the roles are added back in one request
+        fails = await self.api._swap_roles(
+            member,
+            [mute_role],
+            roles,
             reason=_("[WarnSystem] Member unmuted by {author} (ID: {author.id})").format(
                 author=ctx.author
             ),
         )
-        roles = list(filter(None, [guild.get_role(x) for x in roles]))
-        if not roles:
-            await ctx.send(_("Member unmuted."))
-            return
-        await ctx.send(
-            _("Member unmuted. {len_roles} roles to reassign...").format(len_roles=len(roles))
-        )
-        async with ctx.typing():
-            fails = []
-            for role in roles:
-                try:
-                    await member.add_roles(role)
-                except discord.errors.HTTPException as e:
-                    log.error(
-                        f"Failed to reapply role {role} ({role.id}) on guild {guild} "
-                        f"({guild.id}) after unmute.",
-                        exc_info=e,
-                    )
-                    fails.append(role)
-        text = _("Done.")
+        if mute_role in fails:
+            raise fails.pop(mute_role)
+        text = _("Member unmuted.")
         if fails:
-            text.append(_("\n\nFailed to add {fails}/{len_roles} roles back:\n"))
-            for role in fails:
-                text.append(f"- {role.name}\n")
+            for role, e in fails.items():
+                log.error(
+                    f"Failed to reapply role {role} ({role.id}) on guild {guild} "
+                    f"({guild.id}) after unmute.",
+                    exc_info=e,
+                )
+            text += _("\n\nFailed to add {fails}/{len_roles} roles back:\n").format(
+                fails=len(fails), len_roles=len(roles)
+            )
+            text += "".join(f"- {role.name}\n" for role in fails)
         for page in pagify(text):
             await ctx.send(page)
 
@@ -1329,6 +1310,8 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 "Help translating the cog: https://crowdin.com/project/laggrons-dumb-cogs/\n\n"
                 "Support my work on Patreon: https://www.patreon.com/retke"
             ).format(self)
+            + "\n\n"
+            + box(self.api.re_pool.stats())
         )
 
     @listener()
@@ -1351,6 +1334,9 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
     @listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
         guild = after.guild
+        if before.roles != after.roles:
+            # mod roles or immune roles may have been added or removed
+            self.cache.invalidate_automod_immunity(guild, after)
         mute_role = guild.get_role(await self.cache.get_mute_role(guild))
         if not mute_role:
             return
@@ -1363,6 +1349,10 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
                 "was ended due to a manual unmute (role removed)."
             )
 
+    @listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self.cache.invalidate_modlog_channels(channel.guild, channel.id)
+
     @listener()
     async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
         guild = channel.guild
@@ -1401,6 +1391,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
 
     @listener()
     async def on_member_remove(self, member: discord.Member):
+        self.cache.invalidate_automod_immunity(member.guild, member)
         await self.on_manual_action(member.guild, member, 3)
 
     async def on_manual_action(self, guild: discord.Guild, member: discord.Member, level: int):
@@ -1415,54 +1406,149 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
             await self.api.get_modlog_channel(guild, level)
         except errors.NotFound:
             return
-        when = datetime.utcnow()
-        before = when + timedelta(minutes=1)
-        after = when - timedelta(minutes=1)
-        await asyncio.sleep(10)  # prevent small delays from causing a 5 minute delay on entry
-        attempts = 0
-        action = {
-            3: discord.AuditLogAction.kick,
-            5: discord.AuditLogAction.ban,
-        }[level]
+        pending = self.manual_actions.setdefault(guild.id, {})
+        pending[(level, member.id)] = PendingManualAction(member, level)
+        task = self.manual_action_tasks.get(guild.id)
+        if task is None or task.done():
+            self.manual_action_events[guild.id] = asyncio.Event()
+            self.manual_action_tasks[guild.id] = self.bot.loop.create_task(
+                self._poll_manual_actions(guild)
+            )
+        else:
+            self.manual_action_events[guild.id].set()
+
+    async def _poll_manual_actions(self, guild: discord.Guild):
+        # a single poller per guild looks for all pending kicks and bans in the audit logs
+        # during a raid, each page is fetched once instead of once per member
+        pending = self.manual_actions[guild.id]
+        event = self.manual_action_events[guild.id]
+        try:
+            while pending:
+                now = datetime.utcnow()
+                next_check = min(x.next_check for x in pending.values())
+                if next_check > now:
+                    event.clear()
+                    try:
+                        await asyncio.wait_for(event.wait(), (next_check - now).total_seconds())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                for level, action in (
+                    (3, discord.AuditLogAction.kick),
+                    (5, discord.AuditLogAction.ban),
+                ):
+                    targets = {
+                        x.member.id: x
+                        for x in pending.values()
+                        if x.level == level and x.next_check <= now
+                    }
+                    if targets:
+                        await self._check_manual_actions(guild, pending, action, targets)
+        except Exception as e:
+            log.error(
+                f"[Guild {guild.id}] Error while looking for manual actions in the audit logs.",
+                exc_info=e,
+            )
+        finally:
+            del self.manual_actions[guild.id]
+            del self.manual_action_events[guild.id]
+            del self.manual_action_tasks[guild.id]
+
+    async def _check_manual_actions(
+        self,
+        guild: discord.Guild,
+        pending: dict,
+        action: discord.AuditLogAction,
+        targets: dict,
+    ):
+        found = []
+        level = next(iter(targets.values())).level
+
+        def done(target: PendingManualAction):
+            # the action may have been replaced by a new one while fetching the audit logs
+            if pending.get((level, target.member.id)) is target:
+                del pending[(level, target.member.id)]
+
+        after = min(x.when for x in targets.values()) - timedelta(minutes=1)
+        before = max(x.when for x in targets.values()) + timedelta(minutes=1)
+        try:
+            async for entry in guild.audit_logs(
+                limit=None, action=action, before=before, after=after
+            ):
+                target = targets.get(getattr(entry.target, "id", None))
+                if target is None or abs(entry.created_at - target.when) > timedelta(minutes=1):
+                    continue
+                del targets[target.member.id]
+                done(target)
+                found.append((target.member, entry))
+                if not targets:
+                    break
+        except discord.Forbidden:
+            # no need to try again
+            for target in targets.values():
+                done(target)
+            targets.clear()
+        except discord.HTTPException:
+            pass
         # wait up to 15 min to find a matching case
-        while attempts < 3:
-            attempts += 1
-            try:
-                entry = await guild.audit_logs(action=action, before=before, after=after).find(
-                    lambda e: e.target.id == member.id and after < e.created_at < before
-                )
-            except discord.Forbidden:
-                break
-            except discord.HTTPException:
-                pass
+        for target in targets.values():
+            target.attempts += 1
+            if target.attempts >= 3:
+                done(target)
             else:
-                if entry:
-                    if entry.user.id != guild.me.id:
-                        # Don't create modlog entires for the bot's own bans, cogs do this.
-                        mod, reason, date = entry.user, entry.reason, entry.created_at
-                        if isinstance(member, discord.User):
-                            member = UnavailableMember(self.bot, guild._state, member.id)
-                        try:
-                            await self.api.warn(
-                                guild,
-                                [member],
-                                mod,
-                                level,
-                                reason,
-                                date=date,
-                                log_dm=True if level <= 2 else False,
-                                take_action=False,
-                            )
-                        except Exception as e:
-                            log.error(
-                                f"[Guild {guild.id}] Failed to create a case "
-                                "based on manual action. "
-                                f"Member: {member} ({member.id}). Author: {mod} ({mod.id}). "
-                                f"Reason: {reason}",
-                                exc_info=e,
-                            )
-                    return
-            await asyncio.sleep(300)
+                target.next_check = datetime.utcnow() + timedelta(minutes=5)
+        for member, entry in found:
+            await self._log_manual_action(guild, member, level, entry)
+
+    async def _log_manual_action(
+        self,
+        guild: discord.Guild,
+        member: Union[discord.Member, discord.User],
+        level: int,
+        entry: discord.AuditLogEntry,
+    ):
+        if entry.user.id == guild.me.id:
+            # Don't create modlog entires for the bot's own bans, cogs do this.
+            return
+        mod, reason, date = entry.user, entry.reason, entry.created_at
+        if isinstance(member, discord.User):
+            member = UnavailableMember(self.bot, guild._state, member.id)
+        try:
+            await self.api.warn(
+                guild,
+                [member],
+                mod,
+                level,
+                reason,
+                date=date,
+                log_dm=True if level <= 2 else False,
+                take_action=False,
+            )
+        except Exception as e:
+            log.error(
+                f"[Guild {guild.id}] Failed to create a case "
+                "based on manual action. "
+                f"Member: {member} ({member.id}). Author: {mod} ({mod.id}). "
+                f"Reason: {reason}",
+                exc_info=e,
+            )
+
+    @listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        # members losing the role don't trigger on_member_update
+        self.cache.invalidate_automod_immunity(role.guild)
+
+    @listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        # settings edited with the core commands
+        if not ctx.guild:
+            return
+        name = ctx.command.qualified_name
+        if name.startswith("autoimmune") or "adminrole" in name or "modrole" in name:
+            self.cache.invalidate_automod_immunity(ctx.guild)
+        # Red's modlog channel is used if WarnSystem has none
+        if name.startswith("modlogset"):
+            self.cache.invalidate_modlog_channels(ctx.guild)
 
     @listener()
     async def on_command_error(self, ctx, error):
@@ -1560,12 +1646,12 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
         allowed_requesters = ("discord_deleted_user",)
         if requester not in allowed_requesters:
             return False
-        async with self.data.custom("MODLOGS").all() as all_modlogs:
-            for guild_id, modlogs in all_modlogs.items():
-                try:
-                    del all_modlogs[guild_id][str(user_id)]
-                except KeyError:
-                    pass
+        all_modlogs = await self.data.custom("MODLOGS").all()
+        for guild_id, modlogs in all_modlogs.items():
+            if str(user_id) not in modlogs:
+                continue
+            # the member's cases only, with the lock of the guild's modlogs
+            await self.cache.clear_cases(discord.Object(int(guild_id)), discord.Object(user_id))
         return True
 
     async def red_delete_data_for_user(self, *, requester: str, user_id: int):
@@ -1597,4 +1683,7 @@ class WarnSystem(SettingsMixin, AutomodMixin, BaseCog, metaclass=CompositeMetaCl
 
         # stop checking for unmute and unban
         self.task.cancel()
+        for task in list(self.manual_action_tasks.values()):
+            task.cancel()
         self.api.disable_automod()
+        self.api.re_pool.close()